@@ -3,23 +3,53 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 from typing import Final
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-
-from .const import DOMAIN
-from .cozy_client import CozyClient
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    CAPTURE_DIR,
+    CONF_BROKER_BIND,
+    CONF_BROKER_PORT,
+    CONF_CAPTURE,
+    CONF_DEVICE_INFO,
+    CONF_RATE_ADAPTIVE,
+    CONF_RATE_BURST,
+    CONF_RATE_LIMIT,
+    DATA_BROKERS,
+    DEFAULT_BROKER_BIND,
+    DEFAULT_PORT,
+    DOMAIN,
+)
+from .cozylife.broker import Broker
+from .cozylife.capture import FrameRecorder
+from .cozylife.client import CozyClient
+from .cozylife.ratelimit import DEFAULT_BURST, DEFAULT_RATE, TokenBucket
+from .poller import CozyPoller
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: Final = [
     Platform.LIGHT,
+    Platform.SENSOR,
     Platform.SWITCH,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the CozyLife Local domain services."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up CozyLife Local from a config entry."""
@@ -29,38 +59,115 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if entry.entry_id in hass.data[DOMAIN]:
         _LOGGER.debug("Reusing existing client for reloaded entry %s", entry.entry_id)
         client = hass.data[DOMAIN][entry.entry_id]
-        
-        # 如果客户端已连接，直接设置平台
-        if client.connected:
-            await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-            return True
-        else:
-            # 如果连接断开，尝试重新连接
-            _LOGGER.debug("Client disconnected, reconnecting for entry %s", entry.entry_id)
     else:
-        # 新条目，创建新客户端
+        # 新条目，创建新客户端；有缓存的设备身份时跳过握手
         client = CozyClient(
             host=entry.data["host"],
-            port=entry.data.get("port", 5555),
-            hass=hass
+            port=entry.data.get("port", DEFAULT_PORT),
+            device_info=entry.data.get(CONF_DEVICE_INFO),
         )
         hass.data[DOMAIN][entry.entry_id] = client
-
-    # 立即连接设备
-    try:
-        await client.async_connect()
-        _LOGGER.info("Successfully connected to device %s", entry.data["host"])
-    except Exception as exc:
-        _LOGGER.error("Failed to connect to device %s: %s", entry.data["host"], exc)
-        # 即使连接失败也继续设置，让实体处理不可用状态
-        _LOGGER.warning("Device connection failed, entities will start as unavailable")
+    await _async_configure_capture(hass, entry, client)
+    client.rate_limiter = TokenBucket(
+        entry.options.get(CONF_RATE_LIMIT, DEFAULT_RATE),
+        entry.options.get(CONF_RATE_BURST, DEFAULT_BURST),
+        entry.options.get(CONF_RATE_ADAPTIVE, True),
+    )
+    # 握手或身份校验得到新的设备身份时保存到条目；条目数据变化会触发重新加载，
+    # 使启动时离线、之后才上线的设备也能创建实体
+    client.on_identity_change = lambda info: _async_store_device_info(hass, entry, info)
+
+    if client.connected:
+        _LOGGER.debug("Client already connected for entry %s", entry.entry_id)
+    else:
+        # 立即连接设备
+        try:
+            await client.async_connect()
+            _LOGGER.info("Successfully connected to device %s", entry.data["host"])
+        except Exception as exc:
+            _LOGGER.error("Failed to connect to device %s: %s", entry.data["host"], exc)
+            # 即使连接失败也继续设置，让实体处理不可用状态
+            _LOGGER.warning("Device connection failed, entities will start as unavailable")
+
+    # 更新监听器在连接之后注册，本次设置中保存身份不会触发重新加载
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     # 存储客户端并设置平台
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # 每个设备只有一个轮询器，所有实体共享同一次查询结果
+    poller = CozyPoller(hass, client)
+    poller.async_start()
+    entry.async_on_unload(poller.async_stop)
+
+    if broker_port := entry.options.get(CONF_BROKER_PORT, 0):
+        await _async_start_broker(hass, entry, client, broker_port)
+
     return True
 
 
+async def _async_start_broker(
+    hass: HomeAssistant, entry: ConfigEntry, client: CozyClient, port: int
+) -> None:
+    """Share this entry's device connection with other local consumers."""
+    bind = entry.options.get(CONF_BROKER_BIND, DEFAULT_BROKER_BIND)
+    broker = Broker(client, host=bind, port=port)
+    try:
+        await broker.async_start()
+    except OSError as exc:
+        _LOGGER.error(
+            "Failed to start broker for %s on port %s: %s", client.host, port, exc
+        )
+        return
+    brokers = hass.data.setdefault(DATA_BROKERS, {})
+    brokers[entry.entry_id] = broker
+
+    async def async_stop_broker() -> None:
+        brokers.pop(entry.entry_id, None)
+        await broker.async_stop()
+
+    entry.async_on_unload(async_stop_broker)
+
+
+@callback
+def _async_store_device_info(
+    hass: HomeAssistant, entry: ConfigEntry, info: dict | None
+) -> None:
+    """Persist the device identity in the config entry if it changed."""
+    if info is None or entry.data.get(CONF_DEVICE_INFO) == info:
+        return
+    _LOGGER.debug("Storing device identity for %s: %s", entry.data["host"], info)
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_DEVICE_INFO: info}
+    )
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options or cached device identity change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def _async_configure_capture(
+    hass: HomeAssistant, entry: ConfigEntry, client: CozyClient
+) -> None:
+    """Attach or detach the wire capture recorder according to entry options."""
+    if client.recorder is not None:
+        client.recorder.stop()
+        client.recorder = None
+
+    if not entry.options.get(CONF_CAPTURE, False):
+        return
+
+    path = hass.config.path(CAPTURE_DIR, f"{entry.data['host']}.log")
+    await hass.async_add_executor_job(
+        lambda: os.makedirs(os.path.dirname(path), exist_ok=True)
+    )
+    recorder = FrameRecorder(path)
+    recorder.start()
+    client.recorder = recorder
+    _LOGGER.info("Recording device traffic for %s to %s", entry.data["host"], path)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # 先卸载平台
@@ -76,6 +183,9 @@ async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     # 只有在完全删除条目时才断开连接
     client = hass.data[DOMAIN].pop(entry.entry_id, None)
     if client:
+        if client.recorder is not None:
+            client.recorder.stop()
+            client.recorder = None
         await client.async_disconnect()
         _LOGGER.info("Removed CozyLife Local entry for %s", entry.data["host"])
 
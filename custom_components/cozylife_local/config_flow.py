@@ -8,15 +8,38 @@ import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN
-from .udp_discover import async_discover_devices
+from .const import (
+    CONF_BROKER_BIND,
+    CONF_BROKER_PORT,
+    CONF_CAPTURE,
+    CONF_CONFIRMED_CONTROL,
+    CONF_CONTROL_BUDGET,
+    CONF_DEVICE_INFO,
+    CONF_RATE_ADAPTIVE,
+    CONF_RATE_BURST,
+    CONF_RATE_LIMIT,
+    DEFAULT_BROKER_BIND,
+    DOMAIN,
+)
+from .cozylife.client import DEFAULT_CONTROL_BUDGET
+from .cozylife.discovery import async_discover_devices
+from .cozylife.ratelimit import DEFAULT_BURST, DEFAULT_RATE
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _entry_data(user_input: dict[str, Any], client) -> dict[str, Any]:
+    """Build config entry data, caching the device identity when known."""
+    data = dict(user_input)
+    if client.device_info is not None:
+        data[CONF_DEVICE_INFO] = client.device_info
+    return data
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for CozyLife Local."""
 
@@ -27,6 +50,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self.discovered_devices: list[str] = []
         self.selected_device: str | None = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -42,12 +73,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return await self.async_step_manual()
 
         try:
-            from .cozy_client import CozyClient
+            from .cozylife.client import CozyClient
             
             client = CozyClient(
                 host=user_input[CONF_HOST],
-                port=user_input.get(CONF_PORT, 5555),
-                hass=self.hass
+                port=user_input.get(CONF_PORT, 5555)
             )
             await client.async_connect()
             await client.async_disconnect()
@@ -57,7 +87,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             return self.async_create_entry(
                 title=f"CozyLife ({user_input[CONF_HOST]})",
-                data=user_input,
+                data=_entry_data(user_input, client),
             )
 
         except ConnectionRefusedError:
@@ -83,12 +113,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self.selected_device = selected_option
             
             try:
-                from .cozy_client import CozyClient
+                from .cozylife.client import CozyClient
                 
                 client = CozyClient(
                     host=self.selected_device,
-                    port=5555,
-                    hass=self.hass
+                    port=5555
                 )
                 await client.async_connect()
                 await client.async_disconnect()
@@ -98,10 +127,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
                 return self.async_create_entry(
                     title=f"CozyLife ({self.selected_device})",
-                    data={
-                        CONF_HOST: self.selected_device,
-                        CONF_PORT: 5555
-                    },
+                    data=_entry_data(
+                        {CONF_HOST: self.selected_device, CONF_PORT: 5555}, client
+                    ),
                 )
 
             except ConnectionRefusedError:
@@ -139,12 +167,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                from .cozy_client import CozyClient
+                from .cozylife.client import CozyClient
                 
                 client = CozyClient(
                     host=user_input[CONF_HOST],
-                    port=user_input.get(CONF_PORT, 5555),
-                    hass=self.hass
+                    port=user_input.get(CONF_PORT, 5555)
                 )
                 await client.async_connect()
                 await client.async_disconnect()
@@ -154,7 +181,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
                 return self.async_create_entry(
                     title=f"CozyLife ({user_input[CONF_HOST]})",
-                    data=user_input,
+                    data=_entry_data(user_input, client),
                 )
 
             except ConnectionRefusedError:
@@ -170,4 +197,57 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_PORT, default=5555): int,
             }),
             errors=errors
-        )
\ No newline at end of file
+        )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle CozyLife Local options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_CAPTURE, default=options.get(CONF_CAPTURE, False)
+                ): bool,
+                vol.Optional(
+                    CONF_CONFIRMED_CONTROL,
+                    default=options.get(CONF_CONFIRMED_CONTROL, False),
+                ): bool,
+                vol.Optional(
+                    CONF_CONTROL_BUDGET,
+                    default=options.get(CONF_CONTROL_BUDGET, DEFAULT_CONTROL_BUDGET),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.2, max=30)),
+                vol.Optional(
+                    CONF_RATE_LIMIT,
+                    default=options.get(CONF_RATE_LIMIT, DEFAULT_RATE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=50)),
+                vol.Optional(
+                    CONF_RATE_BURST,
+                    default=options.get(CONF_RATE_BURST, DEFAULT_BURST),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                vol.Optional(
+                    CONF_RATE_ADAPTIVE,
+                    default=options.get(CONF_RATE_ADAPTIVE, True),
+                ): bool,
+                vol.Optional(
+                    CONF_BROKER_PORT,
+                    default=options.get(CONF_BROKER_PORT, 0),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+                vol.Optional(
+                    CONF_BROKER_BIND,
+                    default=options.get(CONF_BROKER_BIND, DEFAULT_BROKER_BIND),
+                ): cv.string,
+            }),
+        )
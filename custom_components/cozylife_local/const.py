@@ -1,19 +1,33 @@
-DOMAIN = "cozylife_local"
-
-# http://doc.doit/project-5/doc-8/
-SWITCH_TYPE_CODE = '00'
-LIGHT_TYPE_CODE = '01'
-SUPPORT_DEVICE_CATEGORY = [SWITCH_TYPE_CODE, LIGHT_TYPE_CODE]
+from .cozylife.const import (  # noqa: F401
+    API_DOMAIN,
+    BRIGHT,
+    DEFAULT_PORT,
+    HUE,
+    LANG,
+    LIGHT_DPID,
+    LIGHT_TYPE_CODE,
+    SAT,
+    SUPPORT_DEVICE_CATEGORY,
+    SWITCH,
+    SWITCH_CHANNEL_DPID,
+    SWITCH_DPID,
+    SWITCH_TYPE_CODE,
+    TEMP,
+    WORK_MODE,
+)
 
-# http://doc.doit/project-5/doc-8/
-SWITCH = '1'
-WORK_MODE = '2'
-TEMP = '3'
-BRIGHT = '4'
-HUE = '5'
-SAT = '6'
+DOMAIN = "cozylife_local"
 
-LIGHT_DPID = [SWITCH, WORK_MODE, TEMP, BRIGHT, HUE, SAT]
-SWITCH_DPID = [SWITCH, ]
-LANG = 'en'
-API_DOMAIN = 'api-us.doiting.com'
\ No newline at end of file
+CONF_CAPTURE = 'capture'
+CONF_DEVICE_INFO = 'device_info'
+CONF_CONFIRMED_CONTROL = 'confirmed_control'
+CONF_CONTROL_BUDGET = 'control_budget'
+CONF_RATE_LIMIT = 'rate_limit'
+CONF_RATE_BURST = 'rate_burst'
+CONF_RATE_ADAPTIVE = 'rate_adaptive'
+CONF_BROKER_PORT = 'broker_port'
+CONF_BROKER_BIND = 'broker_bind'
+CAPTURE_DIR = 'cozylife_capture'
+# 代理默认只接受本机连接；需要其他主机访问时在选项中改为 0.0.0.0
+DEFAULT_BROKER_BIND = '127.0.0.1'
+DATA_BROKERS = f"{DOMAIN}_brokers"
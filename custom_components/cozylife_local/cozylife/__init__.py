@@ -0,0 +1,15 @@
+"""Standalone CozyLife local protocol library.
+
+Nothing in this package imports Home Assistant, so the client, discovery
+and catalog code can be scripted and benchmarked on their own, see
+``python -m cozylife --help``.
+"""
+from .client import ControlResult, CozyClient, CozyLifeError
+from .discovery import async_discover_devices
+
+__all__ = [
+    "ControlResult",
+    "CozyClient",
+    "CozyLifeError",
+    "async_discover_devices",
+]
@@ -0,0 +1,312 @@
+"""Command line interface for the CozyLife protocol library.
+
+Run from the directory containing this package, for example::
+
+    python -m cozylife scan
+    python -m cozylife get 192.168.1.50
+    python -m cozylife set 192.168.1.50 1=1 4=500 --confirm
+    python -m cozylife bench simulator --count 200
+    python -m cozylife broker 192.168.1.50 --listen-port 5555
+
+The host ``simulator`` runs the command against an in-process
+:class:`SimulatedDevice`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import json
+import logging
+import statistics
+import sys
+import time
+
+from .broker import DEFAULT_MERGE_WINDOW, Broker
+from .client import ControlResult, CozyClient, CozyLifeError
+from .const import DEFAULT_PORT
+from .discovery import async_discover_devices
+from .ratelimit import DEFAULT_BURST, DEFAULT_RATE, UNLIMITED, TokenBucket
+from .scheduler import PRIORITY_INTERACTIVE
+from .simulator import SimulatedDevice
+
+SIMULATOR_HOST = "simulator"
+
+
+def _parse_assignment(text: str) -> tuple[str, object]:
+    """Parse a ``DPID=VALUE`` argument; values are JSON, falling back to strings."""
+    dpid, sep, raw = text.partition("=")
+    if not sep or not dpid:
+        raise argparse.ArgumentTypeError(f"expected DPID=VALUE, got {text!r}")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return dpid, value
+
+
+def _print_json(data: object) -> None:
+    print(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True))
+
+
+def _identity(client: CozyClient) -> dict:
+    """Return what is known about the device, even without catalog data."""
+    return {
+        "did": client.device_id,
+        "pid": client.pid,
+        "model": client.device_model_name,
+        "type_code": client.device_type_code,
+    }
+
+
+@asynccontextmanager
+async def _async_client(args: argparse.Namespace) -> AsyncIterator[CozyClient]:
+    """Connect to the requested device, starting a simulator if asked to."""
+    simulator: SimulatedDevice | None = None
+    host, port = args.host, args.port
+    if host == SIMULATOR_HOST:
+        simulator = SimulatedDevice(latency=args.latency)
+        port = await simulator.async_start()
+        host = simulator.host
+
+    rate = args.rate
+    if rate is None:
+        # bench 默认测量设备本身，不受客户端限速影响
+        rate = UNLIMITED if args.command == "bench" else DEFAULT_RATE
+
+    # 模拟器的 pid 不在云端目录中，跳过目录查询
+    client = CozyClient(
+        host,
+        port,
+        rate_limiter=TokenBucket(rate, args.burst),
+        lookup_catalog=not (args.offline or simulator is not None),
+    )
+    try:
+        await client.async_connect()
+        yield client
+    finally:
+        await client.async_disconnect()
+        if simulator is not None:
+            await simulator.async_stop()
+
+
+async def _async_scan(args: argparse.Namespace) -> int:
+    hosts = await async_discover_devices()
+    if not args.info:
+        for host in hosts:
+            print(host)
+        return 0
+
+    async def identify(host: str) -> dict:
+        client = CozyClient(host, lookup_catalog=not args.offline)
+        try:
+            await client.async_connect()
+            return {"host": host, **_identity(client)}
+        except (CozyLifeError, ConnectionError) as exc:
+            return {"host": host, "error": str(exc)}
+        finally:
+            await client.async_disconnect()
+
+    _print_json(await asyncio.gather(*(identify(host) for host in hosts)))
+    return 0
+
+
+async def _async_get(args: argparse.Namespace) -> int:
+    async with _async_client(args) as client:
+        data = await client.async_query(args.dpids or None, PRIORITY_INTERACTIVE)
+        _print_json({"device": _identity(client), "state": data})
+    return 0 if data else 1
+
+
+async def _async_set(args: argparse.Namespace) -> int:
+    payload = dict(args.values)
+    async with _async_client(args) as client:
+        if args.confirm:
+            result = await client.async_control_confirmed(
+                payload, args.budget, priority=PRIORITY_INTERACTIVE
+            )
+            print(result)
+            return 0 if result is ControlResult.DELIVERED else 1
+        result = await client.async_control(payload, PRIORITY_INTERACTIVE)
+        return 0 if result is ControlResult.SENT else 1
+
+
+async def _async_bench(args: argparse.Namespace) -> int:
+    async with _async_client(args) as client:
+        latencies: list[float] = []
+        failures = 0
+        started = time.perf_counter()
+        for index in range(args.count):
+            request_started = time.perf_counter()
+            if args.mode == "query":
+                ok = bool(
+                    await client.async_query(args.dpids or None, PRIORITY_INTERACTIVE)
+                )
+            else:
+                # 交替开关，避免固件对重复值做特殊处理
+                result = await client.async_control_confirmed(
+                    {args.dpids[0] if args.dpids else "1": index % 2},
+                    args.budget,
+                    priority=PRIORITY_INTERACTIVE,
+                )
+                ok = result is ControlResult.DELIVERED
+            if ok:
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            else:
+                failures += 1
+        elapsed = time.perf_counter() - started
+
+        report: dict[str, object] = {
+            "mode": args.mode,
+            "requests": args.count,
+            "failures": failures,
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_s": round(args.count / elapsed, 1) if elapsed else None,
+        }
+        if latencies:
+            latencies.sort()
+            report["latency_ms"] = {
+                "min": round(latencies[0], 2),
+                "avg": round(statistics.fmean(latencies), 2),
+                "p50": round(latencies[len(latencies) // 2], 2),
+                "p95": round(
+                    latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2
+                ),
+                "max": round(latencies[-1], 2),
+            }
+        report["metrics"] = client.metrics.as_dict()
+        report["rate_limit"] = client.rate_limiter.as_dict()
+        _print_json(report)
+    return 0 if not failures else 1
+
+
+async def _async_broker(args: argparse.Namespace) -> int:
+    async with _async_client(args) as client:
+        broker = Broker(
+            client,
+            host=args.bind,
+            port=args.listen_port,
+            merge_window=args.merge_window,
+            poll_interval=args.poll_interval,
+        )
+        port = await broker.async_start()
+        print(
+            f"Broker for {client.host}:{client.port} listening on {broker.host}:{port}",
+            flush=True,
+        )
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await broker.async_stop()
+    return 0
+
+
+async def _async_simulate(args: argparse.Namespace) -> int:
+    simulator = SimulatedDevice(host=args.bind, port=args.port, latency=args.latency)
+    port = await simulator.async_start()
+    print(f"Simulated device listening on {simulator.host}:{port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.async_stop()
+    return 0
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="cozylife", description="Talk to CozyLife devices on the local network."
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_target(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument(
+            "host", help=f"device address, or {SIMULATOR_HOST!r} for a simulated device"
+        )
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+        sub.add_argument(
+            "--latency", type=float, default=0.0,
+            help="response delay of the simulated device in seconds",
+        )
+        sub.add_argument(
+            "--offline", action="store_true",
+            help="skip the cloud product catalog lookup",
+        )
+        sub.add_argument(
+            "--rate", type=float, default=None,
+            help=(
+                "commands per second allowed by the client's rate limiter "
+                f"(default {DEFAULT_RATE:g}, unlimited for bench)"
+            ),
+        )
+        sub.add_argument("--burst", type=int, default=DEFAULT_BURST)
+
+    scan = subparsers.add_parser("scan", help="discover devices by UDP broadcast")
+    scan.add_argument("--info", action="store_true", help="connect and print identity")
+    scan.add_argument("--offline", action="store_true")
+    scan.set_defaults(func=_async_scan)
+
+    get = subparsers.add_parser("get", help="query device state")
+    add_target(get)
+    get.add_argument("--dpid", dest="dpids", action="append", help="dpid to query")
+    get.set_defaults(func=_async_get)
+
+    set_ = subparsers.add_parser("set", help="set dpid values")
+    add_target(set_)
+    set_.add_argument("values", nargs="+", type=_parse_assignment, metavar="DPID=VALUE")
+    set_.add_argument("--confirm", action="store_true", help="wait for the device ack")
+    set_.add_argument("--budget", type=float, default=2.0)
+    set_.set_defaults(func=_async_set)
+
+    bench = subparsers.add_parser("bench", help="measure request latency")
+    add_target(bench)
+    bench.add_argument("--count", type=int, default=100)
+    bench.add_argument("--mode", choices=("query", "control"), default="query")
+    bench.add_argument("--dpid", dest="dpids", action="append", help="dpid to use")
+    bench.add_argument("--budget", type=float, default=2.0)
+    bench.set_defaults(func=_async_bench)
+
+    broker = subparsers.add_parser(
+        "broker", help="share one device connection with local consumers"
+    )
+    add_target(broker)
+    broker.add_argument("--bind", default="127.0.0.1")
+    broker.add_argument("--listen-port", type=int, default=DEFAULT_PORT)
+    broker.add_argument(
+        "--poll-interval", type=float, default=30.0,
+        help="seconds between device polls; 0 polls only on cache misses",
+    )
+    broker.add_argument(
+        "--merge-window", type=float, default=DEFAULT_MERGE_WINDOW,
+        help="seconds to wait for other commands before forwarding a SET",
+    )
+    broker.set_defaults(func=_async_broker)
+
+    simulate = subparsers.add_parser("simulate", help="serve a simulated device")
+    simulate.add_argument("--bind", default="127.0.0.1")
+    simulate.add_argument("--port", type=int, default=DEFAULT_PORT)
+    simulate.add_argument("--latency", type=float, default=0.0)
+    simulate.set_defaults(func=_async_simulate)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface."""
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    try:
+        return asyncio.run(args.func(args))
+    except KeyboardInterrupt:
+        return 130
+    except (CozyLifeError, ConnectionError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""Share one device connection between several local consumers."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from .catalog import get_sn
+from .client import (
+    CMD_INFO,
+    CMD_QUERY,
+    CMD_REPORT,
+    CMD_SET,
+    DEFAULT_CONTROL_BUDGET,
+    ControlResult,
+    CozyClient,
+)
+from .scheduler import PRIORITY_AUTOMATION, PRIORITY_POLL
+
+_LOGGER = logging.getLogger(__name__)
+
+# 合并窗口内到达的多个控制命令合并为一次 CMD_SET
+DEFAULT_MERGE_WINDOW = 0.02
+
+
+class Broker:
+    """Serve the device protocol to local consumers over one client session.
+
+    Consumers connect exactly as they would to the device.  INFO and QUERY
+    are answered from the client's cache, so only a cache miss reaches the
+    device.  SET commands arriving within ``merge_window`` seconds of each
+    other are merged into one confirmed CMD_SET and every sender gets its
+    own ack.  Changes in the cache are pushed to all consumers as CMD_REPORT
+    frames.  With ``poll_interval`` the broker also polls the device itself;
+    inside Home Assistant the integration's poller does that instead.
+    """
+
+    def __init__(
+        self,
+        client: CozyClient,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        merge_window: float = DEFAULT_MERGE_WINDOW,
+        poll_interval: float | None = None,
+        control_budget: float = DEFAULT_CONTROL_BUDGET,
+    ) -> None:
+        self.client = client
+        self.host = host
+        self.port = port
+        self.merge_window = merge_window
+        self.poll_interval = poll_interval
+        self.control_budget = control_budget
+        self._server: asyncio.Server | None = None
+        self._consumers: set[asyncio.StreamWriter] = set()
+        self._reported: dict = dict(client.state)
+        self._remove_listener = None
+        self._poll_task: asyncio.Task | None = None
+        self._refresh: asyncio.Future | None = None
+        # 等待合并发送的控制命令：合并后的 payload 以及各发送方的 (writer, sn)
+        self._pending_payload: dict = {}
+        self._pending_senders: list[tuple[asyncio.StreamWriter, str | None]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # 已转发、尚未得到设备应答的合并命令及其 payload
+        self._flush_tasks: dict[asyncio.Task, dict] = {}
+        self.queries_from_cache = 0
+        self.queries_forwarded = 0
+        self.sets_received = 0
+        self.sets_forwarded = 0
+        self.reports_pushed = 0
+
+    @property
+    def consumers(self) -> int:
+        """Return the number of connected consumers."""
+        return len(self._consumers)
+
+    async def async_start(self) -> int:
+        """Start listening and return the bound port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._remove_listener = self.client.add_listener(self._handle_client_update)
+        if self.poll_interval:
+            self._poll_task = asyncio.get_running_loop().create_task(self._async_poll())
+        _LOGGER.info(
+            "Broker for %s listening on %s:%s", self.client.host, self.host, self.port
+        )
+        return self.port
+
+    async def async_stop(self) -> None:
+        """Stop listening and disconnect all consumers."""
+        if self._remove_listener is not None:
+            self._remove_listener()
+            self._remove_listener = None
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # 尚未发送的控制命令直接回复失败，避免消费者一直等待应答
+        senders, self._pending_senders = self._pending_senders, []
+        self._pending_payload = {}
+        self._ack(senders, 1)
+        for task in list(self._flush_tasks):
+            task.cancel()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        if self._server:
+            self._server.close()
+            for writer in list(self._consumers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serialisable snapshot of the broker."""
+        return {
+            "port": self.port,
+            "consumers": self.consumers,
+            "queries_from_cache": self.queries_from_cache,
+            "queries_forwarded": self.queries_forwarded,
+            "sets_received": self.sets_received,
+            "sets_forwarded": self.sets_forwarded,
+            "reports_pushed": self.reports_pushed,
+        }
+
+    async def _async_poll(self) -> None:
+        while True:
+            await self.client.async_poll(priority=PRIORITY_POLL)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._consumers.add(writer)
+        _LOGGER.debug("Consumer connected to broker for %s", self.client.host)
+        try:
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                # 端口不做认证，任何格式不对的帧都直接忽略
+                if not isinstance(request, dict):
+                    _LOGGER.debug("Ignoring malformed consumer frame: %s", line)
+                    continue
+                await self._async_dispatch(writer, request)
+        except asyncio.LimitOverrunError:
+            # 超长的行无法按帧解析，断开该消费者
+            _LOGGER.debug("Dropping consumer of %s: frame too long", self.client.host)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._consumers.discard(writer)
+            writer.close()
+
+    async def _async_dispatch(
+        self, writer: asyncio.StreamWriter, request: dict
+    ) -> None:
+        cmd = request.get("cmd")
+        sn = request.get("sn")
+        msg = request.get("msg")
+        if not isinstance(msg, dict):
+            msg = {}
+        if cmd == CMD_INFO:
+            if self.client.device_id is None:
+                await self.client.async_reconnect()
+            self._send(writer, {
+                "pv": 0, "cmd": CMD_INFO, "sn": sn,
+                "msg": {"did": self.client.device_id, "pid": self.client.pid},
+            })
+        elif cmd == CMD_QUERY:
+            requested = msg.get("attr")
+            if not isinstance(requested, list):
+                requested = []
+            # dpid 必须是数字，否则发往设备时无法编码，会把设备误标为不可用
+            attrs = [str(attr) for attr in requested if str(attr).isdigit()]
+            if requested and not attrs:
+                data = {}
+            else:
+                data = await self._async_read([attr for attr in attrs if attr != "0"])
+            self._send(writer, {
+                "pv": 0, "cmd": CMD_QUERY, "sn": sn,
+                "msg": {"attr": [int(attr) for attr in data], "data": data},
+            })
+        elif cmd == CMD_SET:
+            data = msg.get("data")
+            if (
+                not isinstance(data, dict)
+                or not data
+                or not all(str(dpid).isdigit() for dpid in data)
+            ):
+                _LOGGER.debug("Ignoring SET without data: %s", request)
+                return
+            self.sets_received += 1
+            self._pending_payload.update(data)
+            self._pending_senders.append((writer, sn))
+            if self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(
+                    self.merge_window, self._schedule_flush
+                )
+
+    def _unconfirmed_values(self) -> dict:
+        """Return dpid values set by consumers but not yet acked by the device."""
+        values: dict = {}
+        for payload in self._flush_tasks.values():
+            values.update(payload)
+        values.update(self._pending_payload)
+        return values
+
+    def _current_state(self) -> dict:
+        """Return the cached state with unconfirmed SET values laid over it."""
+        # 消费者先 SET 后 QUERY 时，命令可能仍在合并窗口内或等待设备应答，
+        # 直接返回缓存会让消费者读到旧值
+        return {**self.client.state, **self._unconfirmed_values()}
+
+    async def _async_read(self, attrs: list[str]) -> dict:
+        """Return the requested dpids, querying the device only on a cache miss."""
+        state = self._current_state()
+        wanted = attrs or None
+        if state and self.client.available and all(attr in state for attr in attrs):
+            self.queries_from_cache += 1
+        else:
+            # 同时到达的多个缓存未命中只触发一次设备查询
+            if self._refresh is None or self._refresh.done():
+                self.queries_forwarded += 1
+                self._refresh = asyncio.ensure_future(
+                    self.client.async_poll(wanted, PRIORITY_AUTOMATION)
+                )
+            await asyncio.shield(self._refresh)
+            if not self.client.available:
+                # 设备离线时返回空数据，消费者据此标记为不可用
+                return {}
+            state = self._current_state()
+        if wanted is None:
+            return dict(state)
+        return {attr: state[attr] for attr in attrs if attr in state}
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        payload, self._pending_payload = self._pending_payload, {}
+        senders, self._pending_senders = self._pending_senders, []
+        task = asyncio.get_running_loop().create_task(
+            self._async_flush(payload, senders)
+        )
+        self._flush_tasks[task] = payload
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flush_tasks.pop(task, None)
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            _LOGGER.warning(
+                "Forwarding merged control for %s failed: %s", self.client.host, exc
+            )
+
+    async def _async_flush(
+        self, payload: dict, senders: list[tuple[asyncio.StreamWriter, str | None]]
+    ) -> None:
+        """Forward one merged SET and ack every consumer that contributed."""
+        self.sets_forwarded += 1
+        result = ControlResult.TIMED_OUT
+        try:
+            if await self.client.async_reconnect():
+                result = await self.client.async_control_confirmed(
+                    payload, self.control_budget, priority=PRIORITY_AUTOMATION
+                )
+        except BaseException:
+            # 包括 async_stop 取消任务：回复失败后再向上抛出，由完成回调记录
+            self._ack(senders, 1)
+            raise
+        if result is ControlResult.DELIVERED:
+            # 设备已确认，直接更新缓存并推送给所有消费者
+            self.client.update_state(payload)
+        elif result is ControlResult.TIMED_OUT:
+            # 不应答，消费者按自己的超时处理
+            _LOGGER.debug("Merged control for %s timed out: %s", self.client.host, payload)
+            return
+        self._ack(senders, 0 if result is ControlResult.DELIVERED else 1)
+
+    def _ack(
+        self, senders: list[tuple[asyncio.StreamWriter, str | None]], res: int
+    ) -> None:
+        """Answer every consumer whose SET was part of a merged command."""
+        for writer, sn in senders:
+            self._send(writer, {"pv": 0, "cmd": CMD_SET, "sn": sn, "msg": {}, "res": res})
+
+    def _handle_client_update(self) -> None:
+        """Push dpids that changed since the last report to every consumer."""
+        state = self.client.state
+        changed = {
+            dpid: value for dpid, value in state.items()
+            if self._reported.get(dpid) != value
+        }
+        if not changed:
+            return
+        self._reported.update(changed)
+        if not self._consumers:
+            return
+        self.reports_pushed += 1
+        report = {
+            "pv": 0, "cmd": CMD_REPORT, "sn": get_sn(),
+            "msg": {"attr": [int(dpid) for dpid in changed], "data": changed},
+        }
+        for writer in list(self._consumers):
+            self._send(writer, report)
+
+    def _send(self, writer: asyncio.StreamWriter, frame: dict) -> None:
+        if writer.is_closing():
+            return
+        try:
+            writer.write(json.dumps(frame, separators=(",", ":")).encode() + b"\r\n")
+        except (ConnectionError, OSError) as exc:
+            _LOGGER.debug("Dropping broker consumer: %s", exc)
+            self._consumers.discard(writer)
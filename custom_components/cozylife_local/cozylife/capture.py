@@ -0,0 +1,181 @@
+"""Wire-level capture and replay of CozyLife device sessions."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import os
+import queue
+import time
+from typing import NamedTuple
+
+_LOGGER = logging.getLogger(__name__)
+
+DIRECTION_SENT = ">"
+DIRECTION_RECEIVED = "<"
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+
+class CapturedFrame(NamedTuple):
+    """One frame read back from a capture log."""
+
+    timestamp: float
+    direction: str
+    frame: bytes
+
+
+class FrameRecorder:
+    """Record sent and received frames to a rotating capture log.
+
+    Each line is ``<monotonic> <direction> <frame>``.  File writes happen on a
+    listener thread so recording never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+    ) -> None:
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = QueueListener(self._queue, handler)
+        self._logger = logging.Logger(f"{__name__}.{path}")
+        self._logger.addHandler(QueueHandler(self._queue))
+        self._logger.propagate = False
+        self._running = False
+
+    def start(self) -> None:
+        """Start writing frames to disk."""
+        if not self._running:
+            self._listener.start()
+            self._running = True
+
+    def stop(self) -> None:
+        """Flush pending frames and close the capture log."""
+        if self._running:
+            self._running = False
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+
+    def record(self, direction: str, frame: bytes) -> None:
+        """Queue one frame for writing."""
+        if self._running:
+            self._logger.info(
+                "%.6f %s %s",
+                time.monotonic(),
+                direction,
+                frame.rstrip(b"\r\n").decode("utf-8", "replace"),
+            )
+
+
+def load_capture(path: str) -> list[CapturedFrame]:
+    """Load a capture log, including rotated backups, oldest frame first."""
+    paths = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        paths.append(f"{path}.{index}")
+        index += 1
+    paths.reverse()
+    if os.path.exists(path):
+        paths.append(path)
+
+    frames: list[CapturedFrame] = []
+    for part in paths:
+        with open(part, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    timestamp, direction, frame = line.rstrip("\n").split(" ", 2)
+                    frames.append(
+                        CapturedFrame(float(timestamp), direction, frame.encode("utf-8"))
+                    )
+                except ValueError:
+                    _LOGGER.debug("Skipping malformed capture line: %s", line)
+    return frames
+
+
+def _frame_sn(frame: bytes) -> str | None:
+    """Return the sn of a frame, or None if it is not valid JSON."""
+    try:
+        return json.loads(frame).get("sn")
+    except (ValueError, AttributeError):
+        return None
+
+
+class ReplayDevice:
+    """Fake device that plays a capture back to a connecting client.
+
+    Frames the client originally sent are awaited from the live client and
+    the device frames in between are replayed with their original spacing
+    divided by ``speed``.  A ``speed`` of 0 replays as fast as possible.  The
+    ``sn`` of replayed responses is rewritten to the live client's ``sn`` so
+    the client under test matches them as it did in production.
+    """
+
+    def __init__(
+        self,
+        frames: list[CapturedFrame],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        speed: float = 1.0,
+    ) -> None:
+        self.frames = frames
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self._server: asyncio.Server | None = None
+        self.finished = asyncio.Event()
+
+    async def async_start(self) -> int:
+        """Start listening and return the bound port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def async_stop(self) -> None:
+        """Stop listening."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        sn_map: dict[str, str] = {}
+        previous: float | None = None
+        try:
+            for captured in self.frames:
+                if captured.direction == DIRECTION_SENT:
+                    live = await reader.readuntil(b"\r\n")
+                    original_sn = _frame_sn(captured.frame)
+                    live_sn = _frame_sn(live)
+                    if original_sn and live_sn:
+                        sn_map[original_sn] = live_sn
+                elif captured.direction == DIRECTION_RECEIVED:
+                    if previous is not None and self.speed > 0:
+                        await asyncio.sleep(
+                            max(0.0, captured.timestamp - previous) / self.speed
+                        )
+                    frame = captured.frame
+                    original_sn = _frame_sn(frame)
+                    if original_sn in sn_map:
+                        frame = frame.replace(
+                            original_sn.encode(), sn_map[original_sn].encode(), 1
+                        )
+                    writer.write(frame + b"\r\n")
+                    await writer.drain()
+                previous = captured.timestamp
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            _LOGGER.debug("Replay client went away: %s", exc)
+        finally:
+            writer.close()
+            self.finished.set()
@@ -1,17 +1,17 @@
-"""Async utilities for CozyLife device information."""
+"""CozyLife product catalog lookup and message serial numbers."""
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
-from typing import Any
-
-import aiohttp
+import time
 
 from .const import API_DOMAIN, LANG
 
 _LOGGER = logging.getLogger(__name__)
 
+# 按语言缓存成功获取的产品目录，同一进程内多台设备只请求一次云端接口
+_pid_list_cache: dict[str, list] = {}
+
 
 async def async_get_pid_list(lang: str = LANG) -> list:
     """
@@ -24,6 +24,12 @@ async def async_get_pid_list(lang: str = LANG) -> list:
         _LOGGER.warning('Unsupported language %s, falling back to default %s', lang, LANG)
         lang = LANG
 
+    if lang in _pid_list_cache:
+        return _pid_list_cache[lang]
+
+    # aiohttp 仅在真正需要查询目录时导入，保持本包的导入开销最小
+    import aiohttp
+
     url = f'http://{API_DOMAIN}/api/v2/device_product/model'
     params = {'lang': lang}
 
@@ -33,7 +39,9 @@ async def async_get_pid_list(lang: str = LANG) -> list:
                 if response.status == 200:
                     data = await response.json()
                     if data.get('ret') == '1':
-                        return data.get('info', {}).get('list', [])
+                        pid_list = data.get('info', {}).get('list', [])
+                        _pid_list_cache[lang] = pid_list
+                        return pid_list
                     else:
                         _LOGGER.error("API returned error: %s", data)
                         return []
@@ -45,13 +53,18 @@ async def async_get_pid_list(lang: str = LANG) -> list:
         return []
 
 
+_last_sn = 0
+
+
 def get_sn() -> str:
     """
-    message sn
+    message sn, unique and increasing within this process
     :return: str
     """
-    import time
-    return str(int(round(time.time() * 1000)))
+    global _last_sn
+    # 同一毫秒内的多个请求也必须有不同的 sn，否则响应会被错误匹配
+    _last_sn = max(int(round(time.time() * 1000)), _last_sn + 1)
+    return str(_last_sn)
 
 
 # 同步版本 - 使用事件循环运行异步函数
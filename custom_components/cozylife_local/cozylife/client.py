@@ -0,0 +1,753 @@
+"""Async TCP client for CozyLife devices."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from enum import StrEnum
+import json
+import logging
+import time
+from typing import Any
+
+from .const import (
+    DEFAULT_PORT,
+    SWITCH_TYPE_CODE,
+    LIGHT_TYPE_CODE,
+    SWITCH,
+    TEMP,
+    BRIGHT,
+    HUE,
+    SAT,
+)
+from .capture import DIRECTION_RECEIVED, DIRECTION_SENT, FrameRecorder
+from .metrics import ClientMetrics
+from .ratelimit import TokenBucket
+from .rtt import RttEstimator
+from .scheduler import (
+    PRIORITY_AUTOMATION,
+    PRIORITY_POLL,
+    PriorityLock,
+)
+from .catalog import async_get_pid_list, get_sn
+
+_LOGGER = logging.getLogger(__name__)
+
+CMD_INFO = 0
+CMD_QUERY = 2
+CMD_SET = 3
+# 设备或代理主动推送的状态上报，不对应任何请求
+CMD_REPORT = 10
+
+# 断线后自动重连的最小间隔（秒）
+RECONNECT_INTERVAL = 30.0
+MAX_RECEIVE_ATTEMPTS = 3
+# 确认模式下单次调用的默认时间预算（秒）和重试次数
+DEFAULT_CONTROL_BUDGET = 2.0
+DEFAULT_CONTROL_RETRIES = 2
+# 记录尚未读取的应答 sn 的数量上限
+PENDING_ACKS = 32
+
+
+class CozyLifeError(Exception):
+    """Error talking to a CozyLife device."""
+
+
+class ControlResult(StrEnum):
+    """Outcome of a control command.
+
+    Confirmed commands end as DELIVERED, TIMED_OUT or REJECTED; commands sent
+    without waiting for the ack end as SENT, SUPERSEDED or FAILED.
+    """
+
+    DELIVERED = "delivered"
+    TIMED_OUT = "timed_out"
+    REJECTED = "rejected"
+    SENT = "sent"
+    SUPERSEDED = "superseded"
+    FAILED = "failed"
+
+
+class CozyClient:
+    """Async TCP client for CozyLife devices."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_PORT,
+        recorder: FrameRecorder | None = None,
+        device_info: dict | None = None,
+        rate_limiter: TokenBucket | None = None,
+        lookup_catalog: bool = True,
+    ):
+        self.host = host
+        self.port = port
+        # 关闭后不访问云端产品目录，设备型号和类型保持未知
+        self.lookup_catalog = lookup_catalog
+        # 可选的抓包记录器，记录所有收发帧
+        self.recorder = recorder
+        # 发送路径前的令牌桶，保护性能较弱的设备固件
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._connected = False
+        self._device_id: str | None = None
+        self._pid: str | None = None
+        self._device_type_code: str | None = None
+        self._device_model_name: str | None = None
+        self._dpid: list = []
+        self._sn: str | None = None
+        # 按优先级授予连接：用户操作 > 自动化 > 后台轮询
+        self._lock = PriorityLock()
+        self._poll_task: asyncio.Task | None = None
+        self._poll_preempted = False
+        # 所有实体共享的设备状态缓存，一次查询更新全部实体
+        self._state: dict = {}
+        # 只有查询真正失败才标记，连接后尚未查询时仍视为可用
+        self._query_failed = False
+        self._listeners: list[Callable[[], None]] = []
+        # 部分固件不支持按属性查询，发现后回退为全量查询
+        self._partial_query_supported = True
+        # 已发送但未读取应答的 sn，后续读到时直接丢弃
+        self._pending_acks: deque[str] = deque(maxlen=PENDING_ACKS)
+        # 每组 dpid 最新控制命令的序号，用于丢弃被取代的排队命令
+        self._control_generation: dict[frozenset, int] = {}
+        # 跟踪连接尝试
+        self._connection_attempts = 0
+        self._last_connect_attempt = 0.0
+        self._metrics = ClientMetrics()
+        # 根据平滑 RTT 动态计算超时，取代固定的 5s/3s
+        self._rtt = RttEstimator()
+        # 缓存的设备身份本次运行中是否已向设备确认
+        self._identity_verified = False
+        # 握手得到完整身份或校验发现身份变化时回调，参数为新的 device_info
+        self.on_identity_change: Callable[[dict], None] | None = None
+        if device_info:
+            self._apply_device_info(device_info)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def available(self) -> bool:
+        """Return True if connected and the last query, if any, succeeded."""
+        return self._connected and not self._query_failed
+
+    @property
+    def state(self) -> dict:
+        """Return the shared state cache from the last successful query."""
+        return self._state
+
+    @property
+    def device_id(self) -> str | None:
+        return self._device_id
+
+    @property
+    def device_type_code(self) -> str | None:
+        return self._device_type_code
+
+    @property
+    def device_model_name(self) -> str | None:
+        return self._device_model_name
+
+    @property
+    def dpid(self) -> list:
+        return self._dpid
+
+    @property
+    def pid(self) -> str | None:
+        return self._pid
+
+    @property
+    def device_info(self) -> dict | None:
+        """Return the cacheable device identity, or None if it is incomplete."""
+        if not self._pid or not self._device_type_code:
+            return None
+        return {
+            'did': self._device_id,
+            'pid': self._pid,
+            'model': self._device_model_name,
+            'dpid': list(self._dpid),
+            'type_code': self._device_type_code,
+        }
+
+    @property
+    def rtt(self) -> RttEstimator:
+        """Return the RTT estimator behind this client's timeouts."""
+        return self._rtt
+
+    @property
+    def metrics(self) -> ClientMetrics:
+        """Return the rolling performance metrics for this client."""
+        return self._metrics
+
+    def add_listener(self, update_callback: Callable[[], None]) -> Callable[[], None]:
+        """Register a callback run after every query; return a remover."""
+        self._listeners.append(update_callback)
+
+        def remove_listener() -> None:
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _notify_listeners(self) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def update_state(self, data: dict) -> None:
+        """Merge known dpid values into the cache and notify listeners."""
+        self._state.update(data)
+        self._query_failed = False
+        self._notify_listeners()
+
+    def _apply_device_info(self, info: dict) -> None:
+        """Restore device identity from a cached device_info dict."""
+        self._device_id = info.get('did')
+        self._pid = info.get('pid')
+        self._device_model_name = info.get('model')
+        self._dpid = list(info.get('dpid') or [])
+        self._device_type_code = info.get('type_code')
+
+    async def async_connect(self) -> None:
+        """Async connect to device.
+
+        State is not queried here; entities restore their last known state
+        and refresh it later.
+        """
+        if self._connected:
+            _LOGGER.debug("Already connected to %s:%s", self.host, self.port)
+            return
+
+        self._connection_attempts += 1
+        self._last_connect_attempt = time.monotonic()
+        _LOGGER.debug("Connection attempt %d to %s:%s", self._connection_attempts, self.host, self.port)
+
+        try:
+            # 建立 TCP 连接；握手由网络协议栈应答，耗时不代表设备应答速度，
+            # 因此不计入 RTT 估计
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                timeout=self._rtt.connect_timeout
+            )
+            self._connected = True
+            self._connection_attempts = 0  # 重置尝试次数
+            # 新会话重新尝试按属性查询，固件升级或更换设备后可能已支持
+            self._partial_query_supported = True
+            self._metrics.connects += 1
+            _LOGGER.info("Connected to %s:%s", self.host, self.port)
+
+            if self.device_info is None:
+                # 没有缓存的设备身份，需要握手并查询产品目录；
+                # 有缓存时不发送 CMD_INFO，由轮询器调用 async_verify_identity 确认
+                await self._async_get_basic_device_info()
+
+        except asyncio.TimeoutError:
+            self._metrics.timeouts += 1
+            _LOGGER.warning("Connection timeout to %s:%s", self.host, self.port)
+            await self._safe_disconnect()
+            raise ConnectionRefusedError(f"Connection timeout to {self.host}:{self.port}")
+        except Exception as exc:
+            _LOGGER.warning("Connection failed to %s:%s: %s", self.host, self.port, exc)
+            await self._safe_disconnect()
+            raise CozyLifeError(f"Failed to connect: {exc}")
+
+    async def _safe_disconnect(self) -> None:
+        """Safely disconnect from device."""
+        self._connected = False
+        if self._writer:
+            self._writer.close()
+            try:
+                await asyncio.wait_for(self._writer.wait_closed(), timeout=2.0)
+            except asyncio.TimeoutError:
+                pass
+            self._writer = None
+            self._reader = None
+
+    async def async_disconnect(self) -> None:
+        """Async disconnect from device."""
+        await self._safe_disconnect()
+        _LOGGER.debug("Disconnected from %s:%s", self.host, self.port)
+
+    async def async_reconnect(self) -> bool:
+        """Try to re-establish a dropped connection, at most once per interval."""
+        if self._connected:
+            return True
+        if time.monotonic() - self._last_connect_attempt < RECONNECT_INTERVAL:
+            return False
+
+        try:
+            await self.async_connect()
+        except Exception as exc:
+            _LOGGER.debug("Reconnect to %s failed: %s", self.host, exc)
+            return False
+        return True
+
+    async def _async_get_basic_device_info(self) -> None:
+        """Get basic device information needed for platform setup."""
+        try:
+            async with self._locked():
+                response = await self._async_request(CMD_INFO, {})
+
+            if not response or 'msg' not in response:
+                _LOGGER.warning("Invalid device info response from %s", self.host)
+                return
+
+            msg = response['msg']
+            self._device_id = msg.get('did')
+            self._pid = msg.get('pid')
+
+            if not self._device_id or not self._pid:
+                _LOGGER.warning("Missing device ID or PID from %s", self.host)
+                return
+            self._identity_verified = True
+
+            # 获取设备类型信息
+            await self._async_get_device_type()
+
+            # 首次得到完整身份时交给调用方保存；启动时离线的设备上线后靠它创建实体
+            info = self.device_info
+            if info is not None and self.on_identity_change is not None:
+                self.on_identity_change(info)
+
+        except Exception as exc:
+            _LOGGER.warning("Failed to get basic device info from %s: %s", self.host, exc)
+
+    async def async_verify_identity(self) -> None:
+        """Confirm the cached identity and refresh it if the device changed.
+
+        Meant for background polling: the check runs at most once per client,
+        is skipped like a poll while a control command is queued or the rate
+        limiter is empty, and is cancelled if a control arrives mid-flight.
+        A skipped or unanswered check is tried again on the next call.
+        """
+        if self._identity_verified or self.device_info is None or not self._connected:
+            return
+        if self._lock.has_waiters(PRIORITY_POLL) or not self.rate_limiter.available():
+            return
+
+        response = None
+        async with self._locked(PRIORITY_POLL):
+            if self._lock.has_waiters(PRIORITY_POLL):
+                return
+            try:
+                # 与轮询相同，放在 _poll_task 中以便被控制命令抢占
+                self._poll_preempted = False
+                self._poll_task = asyncio.ensure_future(
+                    self._async_request(CMD_INFO, {})
+                )
+                response = await self._poll_task
+            except asyncio.CancelledError:
+                if not self._poll_preempted:
+                    raise
+                _LOGGER.debug("Identity check of %s preempted by a control command", self.host)
+                return
+            except Exception as exc:
+                _LOGGER.debug("Identity check failed for %s: %s", self.host, exc)
+                return
+            finally:
+                self._poll_task = None
+
+        msg = (response or {}).get('msg') or {}
+        did = msg.get('did')
+        pid = msg.get('pid')
+        if not did or not pid:
+            return
+        self._identity_verified = True
+        if (did, pid) == (self._device_id, self._pid):
+            return
+
+        _LOGGER.info(
+            "Device %s changed identity: did %s -> %s, pid %s -> %s",
+            self.host, self._device_id, did, self._pid, pid,
+        )
+        self._device_id = did
+        if pid != self._pid:
+            # 只有 pid 变化时才重新查询产品目录
+            self._pid = pid
+            self._device_type_code = None
+            await self._async_get_device_type()
+
+        info = self.device_info
+        if info is not None and self.on_identity_change is not None:
+            self.on_identity_change(info)
+
+    async def _async_get_device_type(self) -> None:
+        """Get device type information."""
+        if not self.lookup_catalog:
+            return
+        try:
+            pid_list = await async_get_pid_list()
+
+            for item in pid_list:
+                for item1 in item.get('m', []):
+                    if item1.get('pid') == self._pid:
+                        self._device_model_name = item1.get('n', 'Unknown')
+                        self._dpid = item1.get('dpid', [])
+                        self._device_type_code = item.get('c', LIGHT_TYPE_CODE)
+                        _LOGGER.info(
+                            "Device info: %s, type: %s", 
+                            self._device_model_name, 
+                            self._device_type_code
+                        )
+                        return
+
+            _LOGGER.warning("No device model found for PID: %s", self._pid)
+
+        except Exception as exc:
+            _LOGGER.warning("Failed to get device type for %s: %s", self.host, exc)
+
+    def _get_package(self, cmd: int, payload: dict) -> bytes:
+        """Create command package."""
+        self._sn = get_sn()
+        
+        if cmd == CMD_SET:
+            message = {
+                'pv': 0,
+                'cmd': cmd,
+                'sn': self._sn,
+                'msg': {
+                    'attr': [int(item) for item in payload.keys()],
+                    'data': payload,
+                }
+            }
+        elif cmd == CMD_QUERY:
+            message = {
+                'pv': 0,
+                'cmd': cmd,
+                'sn': self._sn,
+                'msg': {
+                    # attr 为 [0] 表示查询全部 dpid
+                    'attr': [int(item) for item in payload.get('attr', [])] or [0],
+                }
+            }
+        elif cmd == CMD_INFO:
+            message = {
+                'pv': 0,
+                'cmd': cmd,
+                'sn': self._sn,
+                'msg': {}
+            }
+        else:
+            raise ValueError(f"Invalid command: {cmd}")
+
+        return json.dumps(message, separators=(',', ':')).encode('utf-8') + b"\r\n"
+
+    async def _async_send_command(self, cmd: int, payload: dict) -> None:
+        """Send command to device."""
+        if not self._connected:
+            raise CozyLifeError("Not connected to device")
+
+        if await self.rate_limiter.async_acquire():
+            self._metrics.throttled += 1
+
+        data = self._get_package(cmd, payload)
+        _LOGGER.debug("Sending command to %s: %s", self.host, data.decode('utf-8').strip())
+
+        try:
+            self._writer.write(data)
+            self._metrics.bytes_out += len(data)
+            if self.recorder is not None:
+                self.recorder.record(DIRECTION_SENT, data)
+            await self._writer.drain()
+        except (ConnectionError, OSError):
+            # 连接已断开，标记为未连接以便后续重连
+            self.rate_limiter.penalize()
+            await self._safe_disconnect()
+            raise
+
+    async def _async_receive(self, timeout: float | None = None) -> dict | None:
+        """Receive response from device.
+
+        Without ``timeout`` the adaptive receive timeout is used and widened
+        if it expires.
+        """
+        if not self._connected:
+            return None
+
+        try:
+            data = await asyncio.wait_for(
+                self._reader.readuntil(b"\r\n"),
+                timeout=self._rtt.receive_timeout if timeout is None else timeout
+            )
+            self._metrics.bytes_in += len(data)
+            if self.recorder is not None:
+                self.recorder.record(DIRECTION_RECEIVED, data)
+            response = json.loads(data.decode('utf-8').strip())
+            _LOGGER.debug("Received response from %s: %s", self.host, response)
+            return response
+        except asyncio.TimeoutError:
+            self._metrics.timeouts += 1
+            if timeout is None:
+                self._rtt.backoff()
+            _LOGGER.debug("Receive timeout from %s", self.host)
+            return None
+        except asyncio.IncompleteReadError:
+            _LOGGER.debug("Connection closed by %s", self.host)
+            self.rate_limiter.penalize()
+            await self._safe_disconnect()
+            return None
+        except Exception as exc:
+            _LOGGER.debug("Receive error from %s: %s", self.host, exc)
+            return None
+
+    @asynccontextmanager
+    async def _locked(self, priority: int = PRIORITY_POLL) -> AsyncIterator[None]:
+        """Hold the connection lock, recording how long it took to get it.
+
+        Callers above poll priority cancel an in-flight poll so they never
+        wait behind its receive timeouts.
+        """
+        wait_start = time.perf_counter()
+        if (
+            priority < PRIORITY_POLL
+            and self._poll_task is not None
+            and not self._poll_task.done()
+        ):
+            self._poll_preempted = True
+            self._poll_task.cancel()
+            self._metrics.polls_preempted += 1
+        await self._lock.acquire(priority)
+        try:
+            self._metrics.record_lock_wait(time.perf_counter() - wait_start)
+            yield
+        finally:
+            self._lock.release()
+
+    async def _async_request(
+        self, cmd: int, payload: dict, timeout: float | None = None
+    ) -> dict | None:
+        """Send a command and wait for the response with the matching sn.
+
+        Without ``timeout`` up to three reads are made; with it, reads stop
+        once the deadline passes.  Late acks of earlier commands are dropped
+        without using up an attempt.  Must be called with the lock held.
+        """
+        await self._async_send_command(cmd, payload)
+        return await self._async_await_response(timeout)
+
+    async def _async_await_response(self, timeout: float | None = None) -> dict | None:
+        """Wait for the response to the command just sent, as ``_async_request``."""
+        sn = self._sn
+        sent_at = time.perf_counter()
+        # 退避只在单个请求的多次读取之间生效，避免失联设备拖慢后续请求
+        self._rtt.reset_backoff()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        try:
+            response = await self._async_receive_matching(sn, sent_at, deadline)
+        except asyncio.CancelledError:
+            # 被抢占的请求，其应答稍后到达时丢弃
+            self._pending_acks.append(sn)
+            raise
+        if response is None:
+            _LOGGER.debug("No valid response from %s for sn %s", self.host, sn)
+            # 应答可能稍后到达，记录下来以免干扰后续请求
+            self._pending_acks.append(sn)
+        return response
+
+    async def _async_receive_matching(
+        self, sn: str, sent_at: float, deadline: float | None
+    ) -> dict | None:
+        """Read frames until the one with ``sn`` arrives or attempts run out."""
+        attempts = 0
+        while attempts < MAX_RECEIVE_ATTEMPTS:
+            read_timeout = None
+            if deadline is not None:
+                read_timeout = deadline - time.monotonic()
+                if read_timeout <= 0:
+                    break
+            response = await self._async_receive(read_timeout)
+            if not response:
+                attempts += 1
+                continue
+            if response.get('cmd') == CMD_REPORT:
+                # 主动上报的状态直接更新缓存，不计入尝试次数
+                self.update_state(response.get('msg', {}).get('data', {}))
+                continue
+            response_sn = response.get('sn')
+            if response_sn == sn:
+                sample = time.perf_counter() - sent_at
+                self._metrics.record_rtt(sample)
+                self._rtt.update(sample)
+                self.rate_limiter.recover()
+                return response
+            if response_sn in self._pending_acks:
+                # 之前未读取的应答，丢弃且不计入尝试次数
+                self._pending_acks.remove(response_sn)
+                continue
+            self._metrics.sn_mismatches += 1
+            attempts += 1
+        return None
+
+    async def async_query(
+        self, attrs: list[str] | None = None, priority: int = PRIORITY_AUTOMATION
+    ) -> dict:
+        """Query device state, update the shared cache and notify listeners.
+
+        ``attrs`` limits the query to the given dpids; ``None`` fetches all.
+        Firmware that answers a partial query without any of the requested
+        dpids is switched to full queries for the rest of the session.
+        Only background polls, made with ``PRIORITY_POLL``, may be skipped:
+        they return ``{}`` without sending anything while a control command is
+        queued or the rate limiter is empty, and are cancelled if a control
+        arrives mid-flight; the cache is left untouched.  Other callers always
+        reach the device.
+        """
+        if not self._connected:
+            return {}
+
+        if attrs is not None and not self._partial_query_supported:
+            attrs = None
+
+        is_poll = priority >= PRIORITY_POLL
+        if is_poll and self._lock.has_waiters(PRIORITY_POLL):
+            self._metrics.polls_skipped += 1
+            return {}
+        if is_poll and not self.rate_limiter.available():
+            # 令牌不足时跳过后台轮询，把额度留给控制命令
+            self._metrics.polls_throttled += 1
+            return {}
+
+        data: dict | None = None
+        async with self._locked(priority):
+            if is_poll and self._lock.has_waiters(PRIORITY_POLL):
+                # 等锁期间有控制命令到达，放弃本次轮询
+                self._metrics.polls_skipped += 1
+                return {}
+            try:
+                if is_poll:
+                    self._poll_preempted = False
+                    self._poll_task = asyncio.ensure_future(
+                        self._async_query_attrs(attrs)
+                    )
+                    data = await self._poll_task
+                else:
+                    data = await self._async_query_attrs(attrs)
+                if (
+                    attrs is not None
+                    and data is not None
+                    and not any(attr in data for attr in attrs)
+                ):
+                    _LOGGER.debug(
+                        "%s ignored partial query for %s, using full queries",
+                        self.host, attrs,
+                    )
+                    self._partial_query_supported = False
+                    data = await self._async_query_attrs(None)
+            except asyncio.CancelledError:
+                if not self._poll_preempted:
+                    raise
+                _LOGGER.debug("Poll of %s preempted by a control command", self.host)
+                return {}
+            except Exception as exc:
+                _LOGGER.debug("Query failed for %s: %s", self.host, exc)
+            finally:
+                self._poll_task = None
+
+        data = data or {}
+
+        self._query_failed = not data
+        if data:
+            self._state.update(data)
+        self._notify_listeners()
+        return data
+
+    async def _async_query_attrs(self, attrs: list[str] | None) -> dict | None:
+        """Send one query with the lock held; return its data, None if unanswered."""
+        response = await self._async_request(CMD_QUERY, {'attr': attrs or []})
+        if response is None:
+            return None
+        return response.get('msg', {}).get('data', {})
+
+    async def async_poll(
+        self, attrs: list[str] | None = None, priority: int = PRIORITY_AUTOMATION
+    ) -> None:
+        """Reconnect if needed and refresh the shared state cache."""
+        if await self.async_reconnect():
+            await self.async_query(attrs, priority)
+        else:
+            # 未连接本身即不可用，通知实体刷新可用性
+            self._notify_listeners()
+
+    async def async_control(
+        self, payload: dict, priority: int = PRIORITY_AUTOMATION
+    ) -> ControlResult:
+        """Send control command to device without waiting for the ack.
+
+        A queued command is dropped if a newer one for the same dpids was
+        issued while it waited, since the newer one supersedes it; callers
+        get SUPERSEDED and should leave any follow-up query to the newer one.
+        """
+        if not self._connected:
+            return ControlResult.FAILED
+
+        key = frozenset(payload)
+        generation = self._control_generation.get(key, 0) + 1
+        self._control_generation[key] = generation
+
+        started = time.perf_counter()
+        async with self._locked(priority):
+            if self._control_generation.get(key) != generation:
+                self._metrics.commands_superseded += 1
+                _LOGGER.debug("Dropping superseded control for %s: %s", self.host, payload)
+                return ControlResult.SUPERSEDED
+            try:
+                await self._async_send_command(CMD_SET, payload)
+                self._metrics.record_control_latency(time.perf_counter() - started)
+                # 不等待应答，由后续请求读取并丢弃
+                self._pending_acks.append(self._sn)
+                return ControlResult.SENT
+            except Exception as exc:
+                _LOGGER.debug("Control failed for %s: %s", self.host, exc)
+                return ControlResult.FAILED
+
+    async def async_control_confirmed(
+        self,
+        payload: dict,
+        budget: float = DEFAULT_CONTROL_BUDGET,
+        retries: int = DEFAULT_CONTROL_RETRIES,
+        priority: int = PRIORITY_AUTOMATION,
+    ) -> ControlResult:
+        """Send a control command and wait for the device's ack.
+
+        The command is retried with a new sn until an ack with a matching sn
+        arrives or ``budget`` seconds have passed.  A non-zero ``res`` in the
+        ack is reported as a rejection.
+        """
+        started = time.perf_counter()
+        deadline = time.monotonic() + budget
+        attempt_timeout = budget / (retries + 1)
+
+        for attempt in range(retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._connected:
+                break
+            if attempt:
+                _LOGGER.debug("Retrying control for %s (attempt %d)", self.host, attempt + 1)
+
+            response = None
+            async with self._locked(priority):
+                try:
+                    await self._async_send_command(CMD_SET, payload)
+                    if not attempt:
+                        # 与不确认的路径一致，计入限速等待和写出的耗时
+                        self._metrics.record_control_latency(time.perf_counter() - started)
+                    response = await self._async_await_response(
+                        min(attempt_timeout, remaining)
+                    )
+                except Exception as exc:
+                    _LOGGER.debug("Control failed for %s: %s", self.host, exc)
+
+            if response is not None:
+                if response.get('res', 0) != 0:
+                    _LOGGER.warning(
+                        "Device %s rejected %s: %s", self.host, payload, response
+                    )
+                    return ControlResult.REJECTED
+                return ControlResult.DELIVERED
+
+        _LOGGER.debug("Control for %s not confirmed within %.2fs", self.host, budget)
+        return ControlResult.TIMED_OUT
\ No newline at end of file
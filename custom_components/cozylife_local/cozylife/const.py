@@ -0,0 +1,24 @@
+"""CozyLife protocol constants."""
+
+# http://doc.doit/project-5/doc-8/
+SWITCH_TYPE_CODE = '00'
+LIGHT_TYPE_CODE = '01'
+SUPPORT_DEVICE_CATEGORY = [SWITCH_TYPE_CODE, LIGHT_TYPE_CODE]
+
+# http://doc.doit/project-5/doc-8/
+SWITCH = '1'
+WORK_MODE = '2'
+TEMP = '3'
+BRIGHT = '4'
+HUE = '5'
+SAT = '6'
+
+LIGHT_DPID = [SWITCH, WORK_MODE, TEMP, BRIGHT, HUE, SAT]
+SWITCH_DPID = [SWITCH, ]
+# 多路开关/排插中代表各路开关的 dpid
+SWITCH_CHANNEL_DPID = ['1', '2', '3', '4', '5', '6', '7', '8']
+LANG = 'en'
+API_DOMAIN = 'api-us.doiting.com'
+
+DEFAULT_PORT = 5555
+DISCOVERY_PORT = 6095
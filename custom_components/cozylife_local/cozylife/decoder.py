@@ -0,0 +1,74 @@
+"""Decode raw CozyLife state into typed entity state."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from .const import BRIGHT, HUE, SAT, SWITCH, TEMP
+
+# 设备的 TEMP/BRIGHT/SAT 取值范围均为 0-1000，预先计算换算表避免每次轮询重复浮点运算
+DEVICE_VALUE_MAX = 1000
+
+TEMP_TO_MIREDS: tuple[int, ...] = tuple(
+    int(1000000 / (2700 + ((1000 - value) / 1000) * (6500 - 2700)))
+    for value in range(DEVICE_VALUE_MAX + 1)
+)
+BRIGHT_TO_BRIGHTNESS: tuple[int, ...] = tuple(
+    int(value / 4) for value in range(DEVICE_VALUE_MAX + 1)
+)
+SAT_TO_SATURATION: tuple[int, ...] = tuple(
+    int(value / 10) for value in range(DEVICE_VALUE_MAX + 1)
+)
+
+_MISSING = object()
+
+
+def _index(value: Any) -> int:
+    """Clamp a raw device value into a table index."""
+    return max(0, min(DEVICE_VALUE_MAX, int(value)))
+
+
+def decode_light(state: dict) -> dict[str, Any]:
+    """Decode a light state dict into entity attribute values."""
+    decoded: dict[str, Any] = {}
+    if SWITCH in state:
+        decoded["is_on"] = state[SWITCH] > 0
+    if BRIGHT in state:
+        decoded["brightness"] = BRIGHT_TO_BRIGHTNESS[_index(state[BRIGHT])]
+    if HUE in state and SAT in state:
+        decoded["hs_color"] = (
+            int(state[HUE]),
+            SAT_TO_SATURATION[_index(state[SAT])],
+        )
+    if TEMP in state:
+        decoded["color_temp"] = TEMP_TO_MIREDS[_index(state[TEMP])]
+    return decoded
+
+
+def switch_decoder(channel: str) -> Callable[[dict], dict[str, Any]]:
+    """Return a decoder for one switch channel (dpid)."""
+
+    def decode_switch(state: dict) -> dict[str, Any]:
+        if channel not in state:
+            return {}
+        return {"is_on": state[channel] > 0}
+
+    return decode_switch
+
+
+class StateDecoder:
+    """Decode state dicts and report only the fields that changed."""
+
+    def __init__(self, decode: Callable[[dict], dict[str, Any]]) -> None:
+        self._decode = decode
+        self._last: dict[str, Any] = {}
+
+    def update(self, state: dict) -> dict[str, Any]:
+        """Decode ``state`` and return the fields that differ from last time."""
+        changed = {
+            key: value
+            for key, value in self._decode(state).items()
+            if self._last.get(key, _MISSING) != value
+        }
+        self._last.update(changed)
+        return changed
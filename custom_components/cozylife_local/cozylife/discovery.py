@@ -6,7 +6,8 @@ import socket
 import logging
 from typing import List
 
-from .utils import get_sn
+from .catalog import get_sn
+from .const import DISCOVERY_PORT
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,7 +31,7 @@ async def async_discover_devices() -> List[str]:
     try:
         # 发送广播包
         for _ in range(3):
-            sock.sendto(message_bytes, ('255.255.255.255', 6095))
+            sock.sendto(message_bytes, ('255.255.255.255', DISCOVERY_PORT))
             await asyncio.sleep(0.1)
         
         # 接收响应
@@ -0,0 +1,142 @@
+"""Rolling performance metrics for CozyLife clients."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from typing import Any
+
+# RTT 直方图的桶上限（毫秒），最后一个桶收集所有更慢的响应
+RTT_BUCKETS_MS: tuple[int, ...] = (10, 25, 50, 100, 250, 500, 1000, 2500)
+RTT_WINDOW = 100
+
+
+class ClientMetrics:
+    """Cheap counters updated on the client hot path."""
+
+    __slots__ = (
+        "rtt_histogram",
+        "rtt_samples",
+        "rtt_count",
+        "timeouts",
+        "sn_mismatches",
+        "connects",
+        "bytes_in",
+        "bytes_out",
+        "lock_waits",
+        "lock_wait_total",
+        "lock_wait_max",
+        "control_latency_samples",
+        "control_latency_max",
+        "polls_skipped",
+        "polls_preempted",
+        "throttled",
+        "polls_throttled",
+        "commands_superseded",
+    )
+
+    def __init__(self) -> None:
+        self.rtt_histogram: list[int] = [0] * (len(RTT_BUCKETS_MS) + 1)
+        self.rtt_samples: deque[float] = deque(maxlen=RTT_WINDOW)
+        self.rtt_count = 0
+        self.timeouts = 0
+        self.sn_mismatches = 0
+        self.connects = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.lock_waits = 0
+        self.lock_wait_total = 0.0
+        self.lock_wait_max = 0.0
+        self.control_latency_samples: deque[float] = deque(maxlen=RTT_WINDOW)
+        self.control_latency_max = 0.0
+        self.polls_skipped = 0
+        self.polls_preempted = 0
+        self.throttled = 0
+        self.polls_throttled = 0
+        self.commands_superseded = 0
+
+    @property
+    def reconnects(self) -> int:
+        """Return successful connects after the first one."""
+        return max(0, self.connects - 1)
+
+    @property
+    def rtt_avg_ms(self) -> float | None:
+        """Return the mean RTT over the rolling window."""
+        if not self.rtt_samples:
+            return None
+        return round(sum(self.rtt_samples) / len(self.rtt_samples), 1)
+
+    @property
+    def rtt_p95_ms(self) -> float | None:
+        """Return the 95th percentile RTT over the rolling window."""
+        if not self.rtt_samples:
+            return None
+        ordered = sorted(self.rtt_samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1)
+
+    @property
+    def lock_wait_avg_ms(self) -> float | None:
+        """Return the mean time spent waiting for the client lock."""
+        if not self.lock_waits:
+            return None
+        return round(self.lock_wait_total / self.lock_waits * 1000, 1)
+
+    @property
+    def control_latency_avg_ms(self) -> float | None:
+        """Return the mean time from control call to write over the window."""
+        if not self.control_latency_samples:
+            return None
+        return round(
+            sum(self.control_latency_samples) / len(self.control_latency_samples), 1
+        )
+
+    def record_rtt(self, seconds: float) -> None:
+        """Record one request/response round trip."""
+        ms = seconds * 1000
+        self.rtt_count += 1
+        self.rtt_samples.append(ms)
+        self.rtt_histogram[bisect_left(RTT_BUCKETS_MS, ms)] += 1
+
+    def record_lock_wait(self, seconds: float) -> None:
+        """Record how long a caller waited for the client lock."""
+        self.lock_waits += 1
+        self.lock_wait_total += seconds
+        if seconds > self.lock_wait_max:
+            self.lock_wait_max = seconds
+
+    def record_control_latency(self, seconds: float) -> None:
+        """Record the time from a control call until it reached the wire."""
+        ms = seconds * 1000
+        self.control_latency_samples.append(ms)
+        if ms > self.control_latency_max:
+            self.control_latency_max = ms
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serialisable snapshot of all metrics."""
+        histogram = {
+            f"le_{bound}ms": count
+            for bound, count in zip(RTT_BUCKETS_MS, self.rtt_histogram)
+        }
+        histogram[f"gt_{RTT_BUCKETS_MS[-1]}ms"] = self.rtt_histogram[-1]
+        return {
+            "rtt_count": self.rtt_count,
+            "rtt_avg_ms": self.rtt_avg_ms,
+            "rtt_p95_ms": self.rtt_p95_ms,
+            "rtt_histogram": histogram,
+            "timeouts": self.timeouts,
+            "sn_mismatches": self.sn_mismatches,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "lock_waits": self.lock_waits,
+            "lock_wait_avg_ms": self.lock_wait_avg_ms,
+            "lock_wait_max_ms": round(self.lock_wait_max * 1000, 1),
+            "control_latency_avg_ms": self.control_latency_avg_ms,
+            "control_latency_max_ms": round(self.control_latency_max, 1),
+            "polls_skipped": self.polls_skipped,
+            "polls_preempted": self.polls_preempted,
+            "throttled": self.throttled,
+            "polls_throttled": self.polls_throttled,
+            "commands_superseded": self.commands_superseded,
+        }
@@ -0,0 +1,84 @@
+"""Per-device command rate limiting."""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Any
+
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 3
+# 作为 rate 传入时不做任何限速，例如命令行测量设备本身的延迟
+UNLIMITED = math.inf
+# 自适应模式下速率的下限，以及每次成功应答后恢复的速率
+MIN_RATE = 0.5
+RECOVERY_STEP = 0.1
+
+
+class TokenBucket:
+    """Token bucket in front of a device's send path.
+
+    ``rate`` tokens are added per second up to ``burst``.  In adaptive mode
+    the rate halves whenever the device drops the connection and creeps back
+    towards the configured rate with every answered request.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        adaptive: bool = True,
+    ) -> None:
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.adaptive = adaptive
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate == UNLIMITED:
+            self._tokens = float(self.burst)
+            self._updated = now
+            return
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> bool:
+        """Return True if a token can be taken without waiting."""
+        self._refill()
+        return self._tokens >= 1
+
+    async def async_acquire(self) -> float:
+        """Take one token, waiting for it if needed; return the time waited."""
+        waited = 0.0
+        self._refill()
+        while self._tokens < 1:
+            delay = (1 - self._tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+            self._refill()
+        self._tokens -= 1
+        return waited
+
+    def penalize(self) -> None:
+        """Halve the rate after the device dropped the connection."""
+        if self.adaptive:
+            self.rate = max(MIN_RATE, self.rate / 2)
+
+    def recover(self) -> None:
+        """Move the rate back towards the configured rate."""
+        if self.adaptive and self.rate < self.configured_rate:
+            self.rate = min(self.configured_rate, self.rate + RECOVERY_STEP)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serialisable snapshot of the limiter."""
+        return {
+            "configured_rate": (
+                None if self.configured_rate == UNLIMITED else self.configured_rate
+            ),
+            "rate": None if self.rate == UNLIMITED else round(self.rate, 2),
+            "burst": self.burst,
+            "adaptive": self.adaptive,
+        }
@@ -0,0 +1,78 @@
+"""Adaptive timeouts from smoothed round-trip times."""
+from __future__ import annotations
+
+from typing import Any
+
+# 与 TCP RTO (RFC 6298) 相同的平滑系数
+RTT_ALPHA = 1 / 8
+RTT_BETA = 1 / 4
+RTT_K = 4
+
+INITIAL_RECEIVE_TIMEOUT = 3.0
+MIN_RECEIVE_TIMEOUT = 0.5
+# 不超过原来的固定超时，退避后失联设备的检测也不会比以前慢
+MAX_RECEIVE_TIMEOUT = 3.0
+
+INITIAL_CONNECT_TIMEOUT = 5.0
+MIN_CONNECT_TIMEOUT = 1.0
+MAX_CONNECT_TIMEOUT = 10.0
+
+
+class RttEstimator:
+    """Track smoothed RTT and its variance and derive per-client timeouts.
+
+    Until the first sample arrives the fixed initial timeouts are used.  Each
+    timeout doubles the receive timeout (up to the ceiling) for the rest of
+    the current request, like TCP retransmission backoff; the next request
+    starts from the estimate again.
+    """
+
+    def __init__(self) -> None:
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self._backoff = 1
+
+    def update(self, sample: float) -> None:
+        """Feed one measured round trip, in seconds."""
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(self.srtt - sample)
+            self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * sample
+        self._backoff = 1
+
+    def backoff(self) -> None:
+        """Widen the timeout after a receive timed out."""
+        if self.receive_timeout < MAX_RECEIVE_TIMEOUT:
+            self._backoff *= 2
+
+    def reset_backoff(self) -> None:
+        """Drop the backoff of an earlier request."""
+        self._backoff = 1
+
+    @property
+    def receive_timeout(self) -> float:
+        """Return the timeout for one read, in seconds."""
+        if self.srtt is None or self.rttvar is None:
+            return INITIAL_RECEIVE_TIMEOUT
+        rto = max(MIN_RECEIVE_TIMEOUT, self.srtt + RTT_K * self.rttvar)
+        return min(MAX_RECEIVE_TIMEOUT, rto * self._backoff)
+
+    @property
+    def connect_timeout(self) -> float:
+        """Return the timeout for opening the TCP connection, in seconds."""
+        if self.srtt is None:
+            return INITIAL_CONNECT_TIMEOUT
+        return max(
+            MIN_CONNECT_TIMEOUT, min(MAX_CONNECT_TIMEOUT, 2 * self.receive_timeout)
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serialisable snapshot of the estimate."""
+        return {
+            "srtt_ms": None if self.srtt is None else round(self.srtt * 1000, 1),
+            "rttvar_ms": None if self.rttvar is None else round(self.rttvar * 1000, 1),
+            "receive_timeout_s": round(self.receive_timeout, 3),
+            "connect_timeout_s": round(self.connect_timeout, 3),
+        }
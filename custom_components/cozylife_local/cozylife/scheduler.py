@@ -0,0 +1,60 @@
+"""Priority scheduling of requests on one CozyLife connection."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+
+# 数值越小优先级越高
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AUTOMATION = 1
+PRIORITY_POLL = 2
+
+
+class PriorityLock:
+    """Asyncio lock that grants waiters by priority, FIFO within a priority."""
+
+    def __init__(self) -> None:
+        self._locked = False
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def locked(self) -> bool:
+        """Return True if the lock is held."""
+        return self._locked
+
+    def has_waiters(self, above: int) -> bool:
+        """Return True if anyone with a higher priority than ``above`` waits."""
+        return any(
+            priority < above and not future.done()
+            for priority, _, future in self._waiters
+        )
+
+    async def acquire(self, priority: int) -> None:
+        """Wait until the lock is granted to this caller."""
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 锁已移交给本调用者但任务被取消，转交给下一个等待者
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        """Hand the lock to the highest-priority waiter, or unlock it."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._locked = False
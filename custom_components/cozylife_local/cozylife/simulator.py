@@ -0,0 +1,104 @@
+"""Simulated CozyLife device for scripting and benchmarking without hardware."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+
+from .client import CMD_INFO, CMD_QUERY, CMD_SET
+from .const import BRIGHT, HUE, SAT, SWITCH, TEMP, WORK_MODE
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LIGHT_STATE = {
+    SWITCH: 0,
+    WORK_MODE: 0,
+    TEMP: 500,
+    BRIGHT: 1000,
+    HUE: 0,
+    SAT: 0,
+}
+
+
+class SimulatedDevice:
+    """Stateful fake device speaking the line-JSON protocol.
+
+    INFO, QUERY and SET are answered from an in-memory state after
+    ``latency`` seconds, so a client can be exercised end to end.  Partial
+    queries return only the requested dpids, as current firmware does.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        did: str = "simulated",
+        pid: str = "simulated",
+        state: dict | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.did = did
+        self.pid = pid
+        self.state = dict(DEFAULT_LIGHT_STATE if state is None else state)
+        self._server: asyncio.Server | None = None
+
+    async def async_start(self) -> int:
+        """Start listening and return the bound port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def async_stop(self) -> None:
+        """Stop listening."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _respond(self, request: dict) -> dict | None:
+        """Build the response to one request, or None to stay silent."""
+        cmd = request.get("cmd")
+        msg = request.get("msg") or {}
+        if cmd == CMD_INFO:
+            body = {"did": self.did, "pid": self.pid}
+        elif cmd == CMD_QUERY:
+            attrs = [str(attr) for attr in msg.get("attr", [])]
+            if not attrs or attrs == ["0"]:
+                data = dict(self.state)
+            else:
+                data = {attr: self.state[attr] for attr in attrs if attr in self.state}
+            body = {"attr": [int(attr) for attr in data], "data": data}
+        elif cmd == CMD_SET:
+            self.state.update(msg.get("data", {}))
+            body = {}
+        else:
+            return None
+        return {"pv": 0, "cmd": cmd, "sn": request.get("sn"), "msg": body, "res": 0}
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    _LOGGER.debug("Ignoring malformed frame: %s", line)
+                    continue
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                response = self._respond(request)
+                if response is None:
+                    continue
+                writer.write(
+                    json.dumps(response, separators=(",", ":")).encode() + b"\r\n"
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,43 @@
+"""Diagnostics support for CozyLife Local integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_BROKERS, DOMAIN
+from .cozylife.client import CozyClient
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    client: CozyClient | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+        },
+    }
+    if client is None:
+        return diagnostics
+
+    diagnostics["device"] = {
+        "host": client.host,
+        "port": client.port,
+        "connected": client.connected,
+        "device_id": client.device_id,
+        "pid": client.pid,
+        "model": client.device_model_name,
+        "type_code": client.device_type_code,
+        "dpid": client.dpid,
+    }
+    diagnostics["metrics"] = client.metrics.as_dict()
+    diagnostics["timeouts"] = client.rtt.as_dict()
+    diagnostics["rate_limit"] = client.rate_limiter.as_dict()
+    if broker := hass.data.get(DATA_BROKERS, {}).get(entry.entry_id):
+        diagnostics["broker"] = broker.as_dict()
+    return diagnostics
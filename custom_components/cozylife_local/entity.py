@@ -0,0 +1,182 @@
+"""Base entity for CozyLife Local integration."""
+from __future__ import annotations
+
+from contextvars import ContextVar
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import State, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_platform
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .const import CONF_CONFIRMED_CONTROL, CONF_CONTROL_BUDGET, DOMAIN
+from .cozylife.client import DEFAULT_CONTROL_BUDGET, ControlResult, CozyClient
+from .cozylife.decoder import StateDecoder
+from .cozylife.scheduler import PRIORITY_AUTOMATION, PRIORITY_INTERACTIVE
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_STATE = "state"
+ATTR_CONFIRM = "confirm"
+ATTR_BUDGET = "budget"
+
+CONTROL_SERVICE_SCHEMA = {
+    vol.Required(ATTR_STATE): cv.boolean,
+    vol.Optional(ATTR_CONFIRM, default=True): cv.boolean,
+    vol.Optional(ATTR_BUDGET): vol.All(vol.Coerce(float), vol.Range(min=0.2, max=30)),
+}
+
+# 单次服务调用指定的 (confirm, budget)，优先于配置项；None 表示按配置项
+_control_mode: ContextVar[tuple[bool, float | None] | None] = ContextVar(
+    "cozylife_control_mode", default=None
+)
+
+
+def cozylife_device_info(client: CozyClient, entry: ConfigEntry) -> DeviceInfo:
+    """Return the device registry entry shared by all entities of one device."""
+    # 设备离线且没有缓存身份时只能按条目识别，之后得到 did 会并入同一设备
+    identifiers = {(DOMAIN, entry.entry_id)}
+    if client.device_id:
+        identifiers.add((DOMAIN, client.device_id))
+    return DeviceInfo(
+        identifiers=identifiers,
+        name=entry.title,
+        manufacturer="CozyLife",
+        model=client.device_model_name,
+    )
+
+
+@callback
+def async_register_control_service(
+    name: str, extra_fields: dict | None = None
+) -> None:
+    """Register the per-call control service on the current platform."""
+    entity_platform.async_get_current_platform().async_register_entity_service(
+        name, {**CONTROL_SERVICE_SCHEMA, **(extra_fields or {})}, "async_set_state"
+    )
+
+
+class CozyLifeEntity(RestoreEntity):
+    """Base class for CozyLife entities fed by a shared CozyClient state cache."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(
+        self, client: CozyClient, entry: ConfigEntry, decoder: StateDecoder
+    ):
+        """Initialize the entity."""
+        self._client = client
+        self._entry = entry
+        self._decoder = decoder
+        self._last_available: bool | None = None
+        self._attr_device_info = cozylife_device_info(client, entry)
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self._client.available
+
+    async def async_added_to_hass(self) -> None:
+        """Show cached or restored state and follow the client's updates."""
+        await super().async_added_to_hass()
+        self._last_available = self._client.available
+        if self._client.state:
+            # 重新加载时客户端已有状态缓存
+            self._apply_changes(self._decoder.update(self._client.state))
+        elif (last_state := await self.async_get_last_state()) is not None:
+            self._restore_state(last_state)
+            _LOGGER.debug("Restored %s to %s", self.entity_id, last_state.state)
+
+        self.async_on_remove(self._client.add_listener(self._handle_client_update))
+
+    async def async_update(self) -> None:
+        """Refresh the shared state; all entities of the device are updated."""
+        await self._client.async_poll()
+
+    @property
+    def _control_priority(self) -> int:
+        """Return interactive priority for user-initiated service calls."""
+        if self._context is not None and self._context.user_id is not None:
+            return PRIORITY_INTERACTIVE
+        return PRIORITY_AUTOMATION
+
+    async def _async_refresh_after_control(self, payload: dict) -> None:
+        """Re-read the dpids just set, ahead of background polling."""
+        await self._client.async_poll(list(payload), self._control_priority)
+
+    async def async_set_state(
+        self,
+        state: bool,
+        confirm: bool = True,
+        budget: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Turn on or off, choosing confirmation for this call only."""
+        token = _control_mode.set((confirm, budget))
+        try:
+            if state:
+                await self.async_turn_on(**kwargs)
+            else:
+                await self.async_turn_off()
+        finally:
+            _control_mode.reset(token)
+
+    async def _async_control(self, payload: dict) -> ControlResult:
+        """Send a control command, confirmed or fire-and-forget.
+
+        The mode comes from the calling service when it asks for one and
+        from the entry options otherwise.  In confirmed mode the call waits
+        for the device's ack within the budget and raises if it times out or
+        is rejected, so automations see the failure.  A fire-and-forget
+        command may come back SUPERSEDED; the newer command refreshes state.
+        """
+        options = self._entry.options
+        priority = self._control_priority
+        confirm, budget = _control_mode.get() or (
+            options.get(CONF_CONFIRMED_CONTROL, False), None
+        )
+        if not confirm:
+            return await self._client.async_control(payload, priority)
+
+        if budget is None:
+            budget = options.get(CONF_CONTROL_BUDGET, DEFAULT_CONTROL_BUDGET)
+        result = await self._client.async_control_confirmed(
+            payload, budget, priority=priority
+        )
+        if result is not ControlResult.DELIVERED:
+            raise HomeAssistantError(
+                f"Command to {self._client.host} was not delivered: {result}"
+            )
+        return result
+
+    @callback
+    def _handle_client_update(self) -> None:
+        """Handle new data in the client's state cache.
+
+        State is only written when a decoded field or availability changed,
+        so unchanged polls cause no recorder writes or state events.
+        """
+        changed = self._decoder.update(self._client.state)
+        available = self._client.available
+        if not changed and available == self._last_available:
+            return
+        self._last_available = available
+        self._apply_changes(changed)
+        self.async_write_ha_state()
+
+    def _apply_changes(self, changed: dict) -> None:
+        """Copy decoded fields onto the matching ``_attr_`` attributes."""
+        for key, value in changed.items():
+            setattr(self, f"_attr_{key}", value)
+        if changed:
+            _LOGGER.debug("%s changed: %s", self._client.host, changed)
+
+    def _restore_state(self, state: State) -> None:
+        """Apply a restored state; platforms override this, the default keeps none."""
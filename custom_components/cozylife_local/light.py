@@ -4,6 +4,8 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_COLOR_TEMP,
@@ -12,14 +14,19 @@ from homeassistant.components.light import (
     LightEntity,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN, LIGHT_TYPE_CODE, SWITCH, TEMP, BRIGHT, HUE, SAT
-from .cozy_client import CozyClient
+from .cozylife.client import ControlResult, CozyClient
+from .cozylife.decoder import StateDecoder, decode_light
+from .entity import CozyLifeEntity, async_register_control_service
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICE_SET_LIGHT = "set_light"
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -32,6 +39,14 @@ async def async_setup_entry(
     # 只有在设备类型匹配时才创建实体，无论连接状态如何
     if client.device_type_code == LIGHT_TYPE_CODE:
         async_add_entities([CozyLifeLight(client, entry)])
+        async_register_control_service(
+            SERVICE_SET_LIGHT,
+            {
+                vol.Optional(ATTR_BRIGHTNESS): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=255)
+                ),
+            },
+        )
         _LOGGER.info("Created light entity for %s", client.host)
     else:
         _LOGGER.debug(
@@ -40,51 +55,33 @@ async def async_setup_entry(
         )
 
 
-class CozyLifeLight(LightEntity):
+class CozyLifeLight(CozyLifeEntity, LightEntity):
     """CozyLife Light entity."""
 
     def __init__(self, client: CozyClient, entry: ConfigEntry):
-        """Initialize with initial state."""
-        self._client = client
-        self._entry = entry
+        """Initialize the light."""
+        super().__init__(client, entry, StateDecoder(decode_light))
         self._attr_unique_id = f"{entry.entry_id}_light"
-        self._attr_has_entity_name = True
         self._attr_translation_key = "cozylife_light"
-        
-        # 使用缓存的初始状态，避免重复查询
-        initial_state = client.initial_state
-        self._attr_is_on = initial_state.get(SWITCH, 0) > 0 if initial_state else None
-        self._attr_available = client.connected
+        self._attr_is_on = None
         self._attr_brightness = None
         self._attr_hs_color = None
         self._attr_color_temp = None
-        
-        # 如果有初始状态，设置相应的属性
-        if initial_state:
-            if BRIGHT in initial_state:
-                self._attr_brightness = int(initial_state[BRIGHT] / 4)
-            if HUE in initial_state and SAT in initial_state:
-                self._attr_hs_color = (
-                    int(initial_state[HUE]),
-                    int(initial_state[SAT] / 10)
-                )
-            if TEMP in initial_state:
-                device_temp = initial_state[TEMP]
-                kelvin = 2700 + ((1000 - device_temp) / 1000) * (6500 - 2700)
-                self._attr_color_temp = int(1000000 / kelvin)
-        
-        _LOGGER.debug("Light %s initialized with state: on=%s, brightness=%s", 
-                     client.host, self._attr_is_on, self._attr_brightness)
-        
+
         self._attr_supported_color_modes = set()
         self._update_supported_color_modes()
 
-    async def async_added_to_hass(self) -> None:
-        """当实体添加到 Home Assistant 时调用."""
-        await super().async_added_to_hass()
-        # 如果还没有状态，立即触发一次更新
-        if self._attr_is_on is None:
-            self.hass.async_create_task(self.async_update())
+    def _restore_state(self, state: State) -> None:
+        """Restore the last known on/off state and color attributes."""
+        if state.state in (STATE_ON, STATE_OFF):
+            self._attr_is_on = state.state == STATE_ON
+        attributes = state.attributes
+        if (brightness := attributes.get(ATTR_BRIGHTNESS)) is not None:
+            self._attr_brightness = int(brightness)
+        if (hs_color := attributes.get(ATTR_HS_COLOR)) is not None:
+            self._attr_hs_color = tuple(hs_color)
+        if (color_temp := attributes.get(ATTR_COLOR_TEMP)) is not None:
+            self._attr_color_temp = int(color_temp)
 
     def _update_supported_color_modes(self):
         """Update supported color modes based on device capabilities."""
@@ -110,47 +107,6 @@ class CozyLifeLight(LightEntity):
         else:
             self._attr_color_mode = ColorMode.ONOFF
 
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._client.connected and self._attr_available
-
-    async def async_update(self) -> None:
-        """Update entity state."""
-        if not self._client.connected:
-            self._attr_available = False
-            return
-
-        try:
-            state = await self._client.async_query()
-            if not state:
-                self._attr_available = False
-                return
-
-            self._attr_available = True
-            self._attr_is_on = state.get(SWITCH, 0) > 0
-
-            if BRIGHT in state:
-                self._attr_brightness = int(state[BRIGHT] / 4)
-
-            if HUE in state and SAT in state:
-                self._attr_hs_color = (
-                    int(state[HUE]),
-                    int(state[SAT] / 10)
-                )
-
-            if TEMP in state:
-                device_temp = state[TEMP]
-                kelvin = 2700 + ((1000 - device_temp) / 1000) * (6500 - 2700)
-                self._attr_color_temp = int(1000000 / kelvin)
-
-            _LOGGER.debug("Light %s state: on=%s, brightness=%s", 
-                         self._client.host, self._attr_is_on, self._attr_brightness)
-
-        except Exception as exc:
-            _LOGGER.warning("Update failed for light %s: %s", self._client.host, exc)
-            self._attr_available = False
-
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the light on."""
         payload = {SWITCH: 255}
@@ -169,9 +125,13 @@ class CozyLifeLight(LightEntity):
             payload[TEMP] = max(0, min(1000, int(device_temp)))
 
         try:
-            success = await self._client.async_control(payload)
-            if success:
-                await self.async_update()
+            result = await self._async_control(payload)
+            if result is ControlResult.SUPERSEDED:
+                # 已被更新的命令取代，由新命令负责刷新，不再额外查询
+                _LOGGER.debug("Turn on of light %s superseded", self._client.host)
+            elif result is not ControlResult.FAILED:
+                # 只查询本次修改的属性
+                await self._async_refresh_after_control(payload)
                 _LOGGER.debug("Turned on light %s", self._client.host)
             else:
                 _LOGGER.warning("Failed to turn on light %s", self._client.host)
@@ -181,10 +141,15 @@ class CozyLifeLight(LightEntity):
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
+        payload = {SWITCH: 0}
         try:
-            success = await self._client.async_control({SWITCH: 0})
-            if success:
-                await self.async_update()
+            result = await self._async_control(payload)
+            if result is ControlResult.SUPERSEDED:
+                # 已被更新的命令取代，由新命令负责刷新，不再额外查询
+                _LOGGER.debug("Turn off of light %s superseded", self._client.host)
+            elif result is not ControlResult.FAILED:
+                # 只查询本次修改的属性
+                await self._async_refresh_after_control(payload)
                 _LOGGER.debug("Turned off light %s", self._client.host)
             else:
                 _LOGGER.warning("Failed to turn off light %s", self._client.host)
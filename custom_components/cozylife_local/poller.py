@@ -0,0 +1,99 @@
+"""Per-device state polling for CozyLife Local integration."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+import random
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN, LIGHT_TYPE_CODE, SWITCH
+from .cozylife.client import CozyClient
+from .cozylife.scheduler import PRIORITY_POLL
+
+_LOGGER = logging.getLogger(__name__)
+
+SCAN_INTERVAL = timedelta(seconds=30)
+# 每隔多少个轮询周期做一次全量查询，其余周期只查询开关状态
+FULL_REFRESH_EVERY = 5
+
+# 启动后的首次刷新随机分散在该时间窗口内（秒），并限制全局并发数
+STARTUP_REFRESH_SPREAD = 10.0
+STARTUP_REFRESH_CONCURRENCY = 4
+DATA_REFRESH_SEMAPHORE = f"{DOMAIN}_refresh_semaphore"
+
+
+class CozyPoller:
+    """Poll one device on behalf of all of its entities.
+
+    Every entity of a device listens to the client's shared state cache, so
+    the device sees one query per interval however many entities it has.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: CozyClient) -> None:
+        self.hass = hass
+        self.client = client
+        self._polling = False
+        self._cycle = 0
+        self._unsub_interval: CALLBACK_TYPE | None = None
+        self._startup_task: asyncio.Task | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Schedule the deferred first refresh and the regular interval."""
+        self._startup_task = self.hass.async_create_task(
+            self._async_startup_refresh()
+        )
+        self._unsub_interval = async_track_time_interval(
+            self.hass, self._async_interval_refresh, SCAN_INTERVAL
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling."""
+        if self._startup_task is not None:
+            self._startup_task.cancel()
+            self._startup_task = None
+        if self._unsub_interval is not None:
+            self._unsub_interval()
+            self._unsub_interval = None
+
+    def _fast_attrs(self) -> list[str] | None:
+        """Return the dpids polled on fast cycles, or None for a full query."""
+        # 灯的颜色和色温变化较少，快速周期只查询开关
+        if self.client.device_type_code == LIGHT_TYPE_CODE:
+            return [SWITCH]
+        return None
+
+    async def async_refresh(self, full: bool = False) -> None:
+        """Poll the device unless a poll is already running."""
+        if self._polling:
+            return
+        self._polling = True
+        try:
+            if full or self._cycle % FULL_REFRESH_EVERY == 0:
+                attrs = None
+            else:
+                attrs = self._fast_attrs()
+            self._cycle += 1
+            await self.client.async_poll(attrs, PRIORITY_POLL)
+            # 缓存的设备身份在轮询中确认，首次刷新受启动分散和并发限制约束
+            await self.client.async_verify_identity()
+        except Exception as exc:
+            _LOGGER.warning("Polling %s failed: %s", self.client.host, exc)
+        finally:
+            self._polling = False
+
+    async def _async_startup_refresh(self) -> None:
+        """Refresh once after startup without flooding the network."""
+        await asyncio.sleep(random.uniform(0, STARTUP_REFRESH_SPREAD))
+        semaphore = self.hass.data.setdefault(
+            DATA_REFRESH_SEMAPHORE, asyncio.Semaphore(STARTUP_REFRESH_CONCURRENCY)
+        )
+        async with semaphore:
+            await self.async_refresh(full=True)
+
+    async def _async_interval_refresh(self, now: datetime) -> None:
+        await self.async_refresh()
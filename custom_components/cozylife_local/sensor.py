@@ -0,0 +1,157 @@
+"""Diagnostic sensor platform for CozyLife Local integration."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import StateType
+
+from .const import DOMAIN
+from .cozylife.client import CozyClient
+from .cozylife.metrics import ClientMetrics
+from .entity import cozylife_device_info
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class CozyLifeSensorEntityDescription(SensorEntityDescription):
+    """Describes a CozyLife diagnostic sensor."""
+
+    value_fn: Callable[[ClientMetrics], StateType]
+
+
+SENSORS: tuple[CozyLifeSensorEntityDescription, ...] = (
+    CozyLifeSensorEntityDescription(
+        key="rtt_avg",
+        translation_key="rtt_avg",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.rtt_avg_ms,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="rtt_p95",
+        translation_key="rtt_p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.rtt_p95_ms,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="timeouts",
+        translation_key="timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.timeouts,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="sn_mismatches",
+        translation_key="sn_mismatches",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.sn_mismatches,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="reconnects",
+        translation_key="reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.reconnects,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="bytes_in",
+        translation_key="bytes_in",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_in,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="bytes_out",
+        translation_key="bytes_out",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_out,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="lock_wait_avg",
+        translation_key="lock_wait_avg",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.lock_wait_avg_ms,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="control_latency_avg",
+        translation_key="control_latency_avg",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.control_latency_avg_ms,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="control_latency_max",
+        translation_key="control_latency_max",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: round(metrics.control_latency_max, 1),
+    ),
+    CozyLifeSensorEntityDescription(
+        key="throttled",
+        translation_key="throttled",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.throttled + metrics.polls_throttled,
+    ),
+    CozyLifeSensorEntityDescription(
+        key="commands_superseded",
+        translation_key="commands_superseded",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.commands_superseded,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up diagnostic sensor platform."""
+    client: CozyClient = hass.data[DOMAIN][entry.entry_id]
+
+    # 诊断传感器默认禁用，由用户在实体设置中按需启用
+    async_add_entities(
+        CozyLifeMetricSensor(client, entry, description) for description in SENSORS
+    )
+
+
+class CozyLifeMetricSensor(SensorEntity):
+    """Diagnostic sensor exposing one client metric."""
+
+    entity_description: CozyLifeSensorEntityDescription
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        client: CozyClient,
+        entry: ConfigEntry,
+        description: CozyLifeSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
+        self._client = client
+        self._entry = entry
+        self.entity_description = description
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        # 与灯/开关实体归属同一设备，多个设备的诊断传感器可在设备页区分
+        self._attr_device_info = cozylife_device_info(client, entry)
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the current metric value."""
+        return self.entity_description.value_fn(self._client.metrics)
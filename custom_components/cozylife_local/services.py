@@ -0,0 +1,183 @@
+"""Fleet-wide services for CozyLife Local integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN
+from .cozylife.client import DEFAULT_CONTROL_BUDGET, ControlResult, CozyClient
+from .cozylife.scheduler import PRIORITY_AUTOMATION
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SNAPSHOT = "snapshot"
+SERVICE_RESTORE = "restore"
+
+ATTR_SCENE_ID = "scene_id"
+ATTR_MAX_PARALLEL = "max_parallel"
+ATTR_CONFIRM = "confirm"
+
+DEFAULT_SCENE_ID = "default"
+DEFAULT_MAX_PARALLEL = 8
+DATA_SNAPSHOTS = f"{DOMAIN}_snapshots"
+
+SNAPSHOT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SCENE_ID, default=DEFAULT_SCENE_ID): cv.string,
+        vol.Optional(ATTR_MAX_PARALLEL, default=DEFAULT_MAX_PARALLEL): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=64)
+        ),
+    }
+)
+RESTORE_SCHEMA = SNAPSHOT_SCHEMA.extend(
+    {vol.Optional(ATTR_CONFIRM, default=False): cv.boolean}
+)
+
+
+async def _async_run_bounded(
+    clients: dict[str, CozyClient],
+    max_parallel: int,
+    job: Callable[[str, CozyClient], Awaitable[Any]],
+) -> dict[str, Any]:
+    """Run ``job`` for every client, at most ``max_parallel`` at a time.
+
+    Returns the result per entry id; a job that raised maps to None.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def run(entry_id: str, client: CozyClient) -> Any:
+        async with semaphore:
+            try:
+                return await job(entry_id, client)
+            except Exception as exc:
+                _LOGGER.debug("Fleet job failed for %s: %s", client.host, exc)
+                return None
+
+    results = await asyncio.gather(
+        *(run(entry_id, client) for entry_id, client in clients.items())
+    )
+    return dict(zip(clients, results))
+
+
+async def _async_read_state(entry_id: str, client: CozyClient) -> dict | None:
+    """Return the full raw dpid state of a device, or None if unreachable."""
+    if not await client.async_reconnect():
+        return None
+    return await client.async_query(None, PRIORITY_AUTOMATION) or None
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the snapshot and restore services."""
+
+    def clients() -> dict[str, CozyClient]:
+        return dict(hass.data.get(DOMAIN, {}))
+
+    async def async_snapshot(call: ServiceCall) -> ServiceResponse:
+        """Capture the raw state of every device in one concurrent pass."""
+        scene_id = call.data[ATTR_SCENE_ID]
+        targets = clients()
+
+        started = time.perf_counter()
+        results = await _async_run_bounded(
+            targets, call.data[ATTR_MAX_PARALLEL], _async_read_state
+        )
+        duration = time.perf_counter() - started
+
+        payloads = {entry_id: data for entry_id, data in results.items() if data}
+        hass.data.setdefault(DATA_SNAPSHOTS, {})[scene_id] = payloads
+        failed = [
+            targets[entry_id].host for entry_id in results if entry_id not in payloads
+        ]
+        _LOGGER.info(
+            "Snapshot %s: %d of %d devices in %.0f ms",
+            scene_id, len(payloads), len(targets), duration * 1000,
+        )
+        return {
+            "scene_id": scene_id,
+            "devices": len(payloads),
+            "failed": failed,
+            "duration_ms": round(duration * 1000, 1),
+        }
+
+    async def async_restore(call: ServiceCall) -> ServiceResponse:
+        """Send every stored payload back as one concurrent CMD_SET wave."""
+        scene_id = call.data[ATTR_SCENE_ID]
+        snapshot = hass.data.get(DATA_SNAPSHOTS, {}).get(scene_id)
+        if snapshot is None:
+            raise HomeAssistantError(f"No CozyLife snapshot named {scene_id!r}")
+
+        # 快照之后被删除的设备直接跳过
+        targets = {
+            entry_id: client
+            for entry_id, client in clients().items()
+            if entry_id in snapshot
+        }
+        confirm = call.data[ATTR_CONFIRM]
+
+        async def restore(entry_id: str, client: CozyClient) -> bool:
+            payload = snapshot[entry_id]
+            if not await client.async_reconnect():
+                return False
+            if confirm:
+                result = await client.async_control_confirmed(
+                    payload, DEFAULT_CONTROL_BUDGET, priority=PRIORITY_AUTOMATION
+                )
+                return result is ControlResult.DELIVERED
+            result = await client.async_control(payload, PRIORITY_AUTOMATION)
+            return result is ControlResult.SENT
+
+        started = time.perf_counter()
+        results = await _async_run_bounded(
+            targets, call.data[ATTR_MAX_PARALLEL], restore
+        )
+        duration = time.perf_counter() - started
+
+        # 恢复后在后台刷新实体状态，不计入恢复耗时
+        for entry_id, ok in results.items():
+            if ok:
+                hass.async_create_task(
+                    targets[entry_id].async_poll(list(snapshot[entry_id]))
+                )
+
+        failed = [targets[entry_id].host for entry_id, ok in results.items() if not ok]
+        _LOGGER.info(
+            "Restore %s: %d of %d devices in %.0f ms",
+            scene_id, len(results) - len(failed), len(results), duration * 1000,
+        )
+        return {
+            "scene_id": scene_id,
+            "devices": len(results) - len(failed),
+            "failed": failed,
+            "duration_ms": round(duration * 1000, 1),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SNAPSHOT,
+        async_snapshot,
+        schema=SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESTORE,
+        async_restore,
+        schema=RESTORE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -6,14 +6,19 @@ from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, SWITCH_TYPE_CODE, SWITCH
-from .cozy_client import CozyClient
+from .const import DOMAIN, SWITCH_TYPE_CODE, SWITCH, SWITCH_CHANNEL_DPID
+from .cozylife.client import ControlResult, CozyClient
+from .cozylife.decoder import StateDecoder, switch_decoder
+from .entity import CozyLifeEntity, async_register_control_service
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICE_SET_SWITCH = "set_switch"
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -25,8 +30,19 @@ async def async_setup_entry(
     
     # 只有在设备类型匹配时才创建实体，无论连接状态如何
     if client.device_type_code == SWITCH_TYPE_CODE:
-        async_add_entities([CozyLifeSwitch(client, entry)])
-        _LOGGER.info("Created switch entity for %s", client.host)
+        # 多路开关/排插每一路一个实体，共用同一个客户端连接和状态缓存
+        channels = [
+            dpid for dpid in (str(item) for item in client.dpid)
+            if dpid in SWITCH_CHANNEL_DPID
+        ] or [SWITCH]
+        async_add_entities(
+            CozyLifeSwitch(client, entry, channel, len(channels) > 1)
+            for channel in channels
+        )
+        async_register_control_service(SERVICE_SET_SWITCH)
+        _LOGGER.info(
+            "Created %d switch entities for %s", len(channels), client.host
+        )
     else:
         _LOGGER.debug(
             "Not creating switch entity for %s: device_type=%s",
@@ -34,61 +50,47 @@ async def async_setup_entry(
         )
 
 
-class CozyLifeSwitch(SwitchEntity):
+class CozyLifeSwitch(CozyLifeEntity, SwitchEntity):
     """CozyLife Switch entity."""
 
-    def __init__(self, client: CozyClient, entry: ConfigEntry):
-        """Initialize with initial state."""
-        self._client = client
-        self._entry = entry
-        self._attr_unique_id = f"{entry.entry_id}_switch"
-        self._attr_has_entity_name = True
-        self._attr_translation_key = "cozylife_switch"
-        
-        # 使用缓存的初始状态，避免重复查询
-        initial_state = client.initial_state
-        self._attr_is_on = initial_state.get(SWITCH, 0) > 0 if initial_state else None
-        self._attr_available = client.connected
-        _LOGGER.debug("Switch %s initialized with state: %s", client.host, self._attr_is_on)
-
-    async def async_added_to_hass(self) -> None:
-        """当实体添加到 Home Assistant 时调用."""
-        await super().async_added_to_hass()
-        # 如果还没有状态，立即触发一次更新
-        if self._attr_is_on is None:
-            self.hass.async_create_task(self.async_update())
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._client.connected and self._attr_available
-
-    async def async_update(self) -> None:
-        """Update entity state."""
-        if not self._client.connected:
-            self._attr_available = False
-            return
-
-        try:
-            state = await self._client.async_query()
-            if not state:
-                self._attr_available = False
-                return
-
-            self._attr_available = True
-            self._attr_is_on = state.get(SWITCH, 0) > 0
-            _LOGGER.debug("Switch %s state: %s", self._client.host, self._attr_is_on)
-
-        except Exception as exc:
-            _LOGGER.warning("Update failed for switch %s: %s", self._client.host, exc)
-            self._attr_available = False
+    def __init__(
+        self,
+        client: CozyClient,
+        entry: ConfigEntry,
+        channel: str = SWITCH,
+        multi_channel: bool = False,
+    ):
+        """Initialize the switch for one channel (dpid)."""
+        super().__init__(client, entry, StateDecoder(switch_decoder(channel)))
+        self._channel = channel
+        # 第一路保持原有 unique_id，兼容单路设备
+        if channel == SWITCH:
+            self._attr_unique_id = f"{entry.entry_id}_switch"
+        else:
+            self._attr_unique_id = f"{entry.entry_id}_switch_{channel}"
+        if multi_channel:
+            self._attr_translation_key = "cozylife_switch_channel"
+            self._attr_translation_placeholders = {"channel": channel}
+        else:
+            self._attr_translation_key = "cozylife_switch"
+        self._attr_is_on = None
+
+    def _restore_state(self, state: State) -> None:
+        """Restore the last known on/off state."""
+        if state.state in (STATE_ON, STATE_OFF):
+            self._attr_is_on = state.state == STATE_ON
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
+        payload = {self._channel: 255}
         try:
-            success = await self._client.async_control({SWITCH: 255})
-            if success:
-                await self.async_update()
+            result = await self._async_control(payload)
+            if result is ControlResult.SUPERSEDED:
+                # 已被更新的命令取代，由新命令负责刷新，不再额外查询
+                _LOGGER.debug("Turn on of switch %s superseded", self._client.host)
+            elif result is not ControlResult.FAILED:
+                # 只查询本次修改的属性
+                await self._async_refresh_after_control(payload)
                 _LOGGER.debug("Turned on switch %s", self._client.host)
             else:
                 _LOGGER.warning("Failed to turn on switch %s", self._client.host)
@@ -98,10 +100,15 @@ class CozyLifeSwitch(SwitchEntity):
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
+        payload = {self._channel: 0}
         try:
-            success = await self._client.async_control({SWITCH: 0})
-            if success:
-                await self.async_update()
+            result = await self._async_control(payload)
+            if result is ControlResult.SUPERSEDED:
+                # 已被更新的命令取代，由新命令负责刷新，不再额外查询
+                _LOGGER.debug("Turn off of switch %s superseded", self._client.host)
+            elif result is not ControlResult.FAILED:
+                # 只查询本次修改的属性
+                await self._async_refresh_after_control(payload)
                 _LOGGER.debug("Turned off switch %s", self._client.host)
             else:
                 _LOGGER.warning("Failed to turn off switch %s", self._client.host)